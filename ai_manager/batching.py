@@ -0,0 +1,71 @@
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    __slots__ = ('item', 'result', 'error', 'done')
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class RequestCoalescer:
+    def __init__(self, handler, max_batch_size=32, max_wait_ms=2.0):
+        self.handler = handler
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="suggest-coalescer", daemon=True)
+                    self._thread.start()
+
+    def submit(self, item, timeout=None):
+        self._ensure_worker()
+        pending = _PendingRequest(item)
+        self.queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError("Batched request timed out")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self.queue.get_nowait())
+                else:
+                    batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = self.handler([pending.item for pending in batch])
+                for pending, result in zip(batch, results):
+                    pending.result = result
+            except Exception as e:
+                logger.error(f"Batch handler error: {e}")
+                for pending in batch:
+                    pending.error = e
+            for pending in batch:
+                pending.done.set()
@@ -0,0 +1,15 @@
+import os
+from stable_baselines3.common.callbacks import BaseCallback
+
+class CancellationCallback(BaseCallback):
+    def __init__(self, cancel_path, check_every=64):
+        super().__init__()
+        self.cancel_path = cancel_path
+        self.check_every = check_every
+        self.cancelled = False
+
+    def _on_step(self):
+        if self.n_calls % self.check_every == 0 and os.path.exists(self.cancel_path):
+            self.cancelled = True
+            return False
+        return True
@@ -0,0 +1,62 @@
+import zlib
+from datetime import datetime, timezone
+import numpy as np
+
+STATE_DIM = 7
+METHOD_CODES = {'GET': 0.0, 'POST': 0.1, 'PUT': 0.2, 'DELETE': 0.3, 'PATCH': 0.4, 'HEAD': 0.5, 'OPTIONS': 0.6}
+
+
+def encode_method(method):
+    method = str(method).upper()
+    if method in METHOD_CODES:
+        return METHOD_CODES[method]
+    return zlib.crc32(method.encode('utf-8')) % 10 / 10
+
+
+def featurize(data):
+    target = data.get('target', '')
+    method = data.get('method', 'GET')
+    param = data.get('param', '')
+    return np.array([
+        len(target) / 100,
+        1 if target.startswith('https') else 0,
+        1 if '?' in target else 0,
+        encode_method(method),
+        0.5,
+        0.5,
+        len(param) / 100
+    ])
+
+
+ACTION_DIM = 3
+
+
+def params_to_action(params):
+    return np.array([
+        min(max((float(params.get('rate', 1000)) - 500) / 4500, 0.0), 1.0),
+        float(params.get('intensity', 0.5)),
+        float(params.get('accuracy', 0.5))
+    ])
+
+
+def scan_reward(vulnerabilities_found, duration):
+    return float(vulnerabilities_found) - float(duration) / 600
+
+
+def sample_from_scan_result(doc):
+    state = doc.get('state')
+    logs = doc.get('logs') or {}
+    params = logs.get('ai_params')
+    if not state or not params:
+        return None
+    timestamp = doc.get('timestamp')
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        timestamp = timestamp.timestamp()
+    return {
+        "features": featurize(state),
+        "action": params_to_action(params),
+        "reward": scan_reward(doc.get('vulnerabilities_found', 0), doc.get('scan_duration', 0)),
+        "timestamp": float(timestamp or 0)
+    }
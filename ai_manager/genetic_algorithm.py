@@ -1,12 +1,155 @@
+import os
+import math
+import time
+import multiprocessing
 import numpy as np
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
+SEARCH_SPACE = {
+    "learning_rate": ("log", 1e-5, 1e-2),
+    "n_steps": ("choice", [256, 512, 1024, 2048, 4096]),
+    "batch_size": ("choice", [32, 64, 128, 256]),
+    "n_epochs": ("int", 3, 20),
+    "gamma": ("float", 0.9, 0.9999),
+    "gae_lambda": ("float", 0.8, 1.0),
+    "clip_range": ("float", 0.1, 0.4),
+    "ent_coef": ("float", 0.0, 0.05),
+}
+
 class GeneticAlgorithmOptimizer:
-    def __init__(self):
-        pass
+    def __init__(self, base_params=None, search_space=None, max_workers=None, mutation_rate=0.2,
+                 elite_size=2, tournament_size=3, early_stop_fraction=0.5, early_stop_budget=0.25, seed=None):
+        if base_params is None:
+            from ai_manager.trainer import load_hyperparameters
+            base_params = load_hyperparameters()
+        search_space = search_space or SEARCH_SPACE
+        self.base_params = dict(base_params)
+        self.keys = [key for key in self.base_params if key in search_space]
+        self.search_space = {key: search_space[key] for key in self.keys}
+        self.max_workers = max_workers or int(os.getenv('GA_WORKERS', os.cpu_count() or 1))
+        self.mutation_rate = mutation_rate
+        self.elite_size = elite_size
+        self.tournament_size = tournament_size
+        self.early_stop_fraction = early_stop_fraction
+        self.early_stop_budget = early_stop_budget
+        self.rng = np.random.default_rng(seed)
+        self.fitness_cache = {}
+        self.partial_cache = {}
+
+    def _sample_gene(self, key):
+        kind, *spec = self.search_space[key]
+        if kind == "log":
+            return float(math.exp(self.rng.uniform(math.log(spec[0]), math.log(spec[1]))))
+        if kind == "choice":
+            return spec[0][int(self.rng.integers(len(spec[0])))]
+        if kind == "int":
+            return int(self.rng.integers(spec[0], spec[1] + 1))
+        return float(self.rng.uniform(spec[0], spec[1]))
+
+    def _normalize_gene(self, key, value):
+        kind, *spec = self.search_space[key]
+        if kind == "choice":
+            return value
+        if kind == "int":
+            return int(value)
+        return float(f"{value:.6g}")
+
+    def _genome(self, params):
+        return tuple(self._normalize_gene(key, params[key]) for key in self.keys)
+
+    def _params(self, genome):
+        params = dict(self.base_params)
+        params.update(zip(self.keys, genome))
+        return params
+
+    def _random_genome(self):
+        return tuple(self._normalize_gene(key, self._sample_gene(key)) for key in self.keys)
+
+    def _mutate(self, genome):
+        return tuple(
+            self._normalize_gene(key, self._sample_gene(key)) if self.rng.random() < self.mutation_rate else value
+            for key, value in zip(self.keys, genome)
+        )
+
+    def _crossover(self, a, b):
+        mask = self.rng.random(len(self.keys)) < 0.5
+        return tuple(x if pick else y for x, y, pick in zip(a, b, mask))
+
+    @staticmethod
+    def _rank(item):
+        # A genome stopped at the partial budget always ranks below any genome
+        # trained at the full budget; scores only compete within one budget.
+        genome, fitness, full_budget = item
+        return full_budget, fitness
+
+    def _tournament(self, scored):
+        picks = self.rng.choice(len(scored), size=min(self.tournament_size, len(scored)), replace=False)
+        return max((scored[i] for i in picks), key=self._rank)[0]
+
+    def _evaluate(self, executor, evaluate_function, genomes, budget, cache):
+        pending = [genome for genome in dict.fromkeys(genomes) if genome not in cache]
+        futures = {genome: executor.submit(evaluate_function, self._params(genome), budget) for genome in pending}
+        for genome, future in futures.items():
+            try:
+                cache[genome] = float(future.result())
+            except Exception as e:
+                logger.error(f"Fitness evaluation error: {e}")
+                cache[genome] = float('-inf')
+        return len(pending)
+
+    def _evaluate_generation(self, executor, evaluate_function, population):
+        unseen = [genome for genome in dict.fromkeys(population) if genome not in self.fitness_cache]
+        stopped = []
+        evaluations = 0
+        if self.early_stop_fraction < 1 and len(unseen) > 1:
+            evaluations += self._evaluate(executor, evaluate_function, unseen, self.early_stop_budget, self.partial_cache)
+            ranked = sorted(unseen, key=lambda genome: self.partial_cache[genome], reverse=True)
+            survivors = max(1, int(math.ceil(len(ranked) * self.early_stop_fraction)))
+            unseen, stopped = ranked[:survivors], ranked[survivors:]
+        evaluations += self._evaluate(executor, evaluate_function, unseen, 1.0, self.fitness_cache)
+        scored = [
+            (genome, self.fitness_cache[genome], True) if genome in self.fitness_cache
+            else (genome, self.partial_cache[genome], False)
+            for genome in population
+        ]
+        return scored, evaluations, len(stopped)
 
     def optimize_hyperparameters(self, evaluate_function, generations=5, population_size=10):
-        best = {"learning_rate": 0.0003, "batch_size": 64}
-        return best, 0.8, []
+        population = [self._genome(self.base_params)]
+        population += [self._random_genome() for _ in range(population_size - 1)]
+        history = []
+        best_genome, best_fitness = population[0], float('-inf')
+        executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            for generation in range(generations):
+                started = time.time()
+                cached_before = sum(genome in self.fitness_cache for genome in population)
+                scored, evaluations, stopped = self._evaluate_generation(executor, evaluate_function, population)
+                scored.sort(key=self._rank, reverse=True)
+                genome, fitness, full_budget = scored[0]
+                if full_budget and fitness > best_fitness:
+                    best_genome, best_fitness = genome, fitness
+                # Reported fitness is full-budget only, so generations compare.
+                fitnesses = [fitness for _, fitness, full_budget in scored if full_budget and math.isfinite(fitness)]
+                history.append({
+                    "generation": generation,
+                    "best_fitness": fitness if full_budget else float('-inf'),
+                    "mean_fitness": float(np.mean(fitnesses)) if fitnesses else float('-inf'),
+                    "evaluations": evaluations,
+                    "cache_hits": cached_before,
+                    "early_stopped": stopped,
+                    "duration": round(time.time() - started, 3)
+                })
+                logger.info(f"🧬 Generation {generation}: best={history[-1]['best_fitness']:.4f} in {history[-1]['duration']}s")
+                elites = [genome for genome, _, _ in scored[:self.elite_size]]
+                children = []
+                while len(elites) + len(children) < population_size:
+                    child = self._crossover(self._tournament(scored), self._tournament(scored))
+                    children.append(self._mutate(child))
+                population = elites + children
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return self._params(best_genome), best_fitness, history
@@ -1,6 +1,11 @@
 import numpy as np
-from stable_baselines3 import PPO
+from ai_manager.features import featurize, STATE_DIM
+from ai_manager.cache import SuggestionCache
+from ai_manager.model_registry import ModelRegistry
+from ai_manager.policy_export import NumpyPolicy
+from monitoring.metrics import timed
 import os
+import threading
 import json
 import logging
 from datetime import datetime
@@ -10,52 +15,145 @@ logger = logging.getLogger(__name__)
 
 class AdvancedInferenceEngine:
     def __init__(self):
-        self.model = None
-        self.model_version = "v1.0"
+        self._serving = (None, "v1.0")
         self.model_path = os.getenv('MODEL_PATH', 'models/ppo_bug_bounty')
+        self.registry = ModelRegistry(self.model_path)
+        self.backend = os.getenv('INFERENCE_BACKEND', 'auto')
+        self.serving_backend = None
         self.fallback_mode = True
+        self.cache = SuggestionCache(
+            max_size=int(os.getenv('SUGGEST_CACHE_SIZE', 4096)),
+            ttl=float(os.getenv('SUGGEST_CACHE_TTL', 300))
+        )
+        self._swap_lock = threading.Lock()
+        self._watcher = None
+        self._stop_watcher = threading.Event()
         self.load_model()
 
+    @property
+    def model(self):
+        return self._serving[0]
+
+    @property
+    def model_version(self):
+        return self._serving[1]
+
     def load_model(self):
         try:
+            version = self.registry.latest_version()
+            if version:
+                return self._load_and_swap(self.registry.path_for(version), version)
             model_file = f"{self.model_path}.zip"
             if os.path.exists(model_file):
-                self.model = PPO.load(model_file)
-                self.fallback_mode = False
-                logger.info("✅ Model loaded")
-            else:
-                logger.warning("⚠️ No model found, using fallback")
+                return self._load_and_swap(model_file, self.model_version)
+            logger.warning("⚠️ No model found, using fallback")
         except Exception as e:
             logger.error(f"Model load error: {e}")
+        return False
+
+    def _load_policy(self, model_file):
+        policy_file = f"{os.path.splitext(model_file)[0]}.npz"
+        if self.backend != 'torch' and os.path.exists(policy_file):
+            return NumpyPolicy.load(policy_file), 'numpy'
+        if self.backend == 'numpy':
+            raise FileNotFoundError(f"No exported policy at {policy_file}")
+        from stable_baselines3 import PPO
+        return PPO.load(model_file), 'torch'
+
+    def _load_and_swap(self, model_file, version):
+        with self._swap_lock:
+            model, backend = self._load_policy(model_file)
+            model.predict(np.zeros(STATE_DIM, dtype=np.float32), deterministic=True)
+            self.serving_backend = backend
+            self._serving = (model, version)
+            self.fallback_mode = False
+            self.cache.clear()
+        logger.info(f"✅ Model loaded ({version}, {backend} backend)")
+        return True
+
+    def check_for_update(self):
+        try:
+            version = self.registry.latest_version()
+            if version and version != self.model_version:
+                return self._load_and_swap(self.registry.path_for(version), version)
+        except Exception as e:
+            logger.error(f"Model hot-swap error: {e}")
+        return False
+
+    def start_watcher(self, interval=30):
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop_watcher.clear()
+
+        def watch():
+            while not self._stop_watcher.wait(interval):
+                self.check_for_update()
 
+        self._watcher = threading.Thread(target=watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop_watcher.set()
+
+    @timed('inference_suggest_seconds', method='suggest')
     def suggest(self, data):
         try:
-            target = data.get('target', '')
-            method = data.get('method', 'GET')
-            param = data.get('param', '')
-            state = np.array([
-                len(target) / 100,
-                1 if target.startswith('https') else 0,
-                1 if '?' in target else 0,
-                hash(method) % 10 / 10,
-                0.5,
-                0.5,
-                len(param) / 100
-            ])
-            if self.model and not self.fallback_mode:
-                action, _ = self.model.predict(state, deterministic=True)
-                return self.action_to_scan_params(action)
+            model, version = self._serving
+            state = featurize(data)
+            if model is not None and not self.fallback_mode:
+                key = self.cache.make_key(state, version)
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return dict(cached)
+                action, _ = model.predict(state, deterministic=True)
+                suggestion = self.action_to_scan_params(action, version)
+                self.cache.put(key, suggestion)
+                return dict(suggestion)
             return self.get_fallback_params()
         except Exception:
             return self.get_fallback_params()
 
-    def action_to_scan_params(self, action):
+    @timed('inference_suggest_seconds', method='suggest_batch')
+    def suggest_batch(self, items):
+        model, version = self._serving
+        results = [None] * len(items)
+        serving = model is not None and not self.fallback_mode
+        rows = []
+        keys = []
+        states = []
+        for i, data in enumerate(items):
+            try:
+                state = featurize(data)
+            except Exception:
+                continue
+            if not serving:
+                continue
+            key = self.cache.make_key(state, version)
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[i] = dict(cached)
+                continue
+            rows.append(i)
+            keys.append(key)
+            states.append(state)
+        if states:
+            try:
+                actions, _ = model.predict(np.stack(states), deterministic=True)
+                for i, key, action in zip(rows, keys, actions):
+                    suggestion = self.action_to_scan_params(action, version)
+                    self.cache.put(key, suggestion)
+                    results[i] = dict(suggestion)
+            except Exception as e:
+                logger.error(f"Batch predict error: {e}")
+        return [result if result is not None else self.get_fallback_params() for result in results]
+
+    def action_to_scan_params(self, action, model_version=None):
         return {
             'rate': int(500 + float(action[0]) * 4500),
             'intensity': float(action[1]),
             'accuracy': float(action[2]),
             'timeout': int(30 + float(action[0]) * 60),
-            'model_version': self.model_version
+            'model_version': model_version or self.model_version
         }
 
     def get_fallback_params(self):
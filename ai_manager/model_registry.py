@@ -0,0 +1,98 @@
+import os
+import json
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    def __init__(self, root=None):
+        self.root = root or os.getenv('MODEL_PATH', 'models/ppo_bug_bounty')
+        self.versions_dir = os.path.join(self.root, 'versions')
+        self.pointer_path = os.path.join(self.root, 'LATEST')
+
+    def new_version(self):
+        return datetime.utcnow().strftime('v%Y%m%d%H%M%S%f')
+
+    def path_for(self, version):
+        return os.path.join(self.versions_dir, f"{version}.zip")
+
+    def policy_path_for(self, version):
+        return os.path.join(self.versions_dir, f"{version}.npz")
+
+    def publish(self, model, version=None, metadata=None):
+        os.makedirs(self.versions_dir, exist_ok=True)
+        version = version or self.new_version()
+        tmp_path = os.path.join(self.versions_dir, f".{version}.tmp.zip")
+        model.save(tmp_path)
+        os.replace(tmp_path, self.path_for(version))
+        parity_error = self._export_policy(model, version)
+        self._write_atomic(os.path.join(self.versions_dir, f"{version}.json"), json.dumps({
+            "version": version,
+            "published_at": datetime.utcnow().isoformat(),
+            "metadata": metadata or {},
+            "numpy_policy": parity_error is not None,
+            "numpy_parity_error": parity_error
+        }))
+        self._write_atomic(self.pointer_path, version)
+        logger.info(f"✅ Published model {version}")
+        return version
+
+    def _export_policy(self, model, version):
+        # The .npz must exist before LATEST moves so replicas can pick either backend.
+        # Returns the max parity error of a successful export, None if it failed.
+        try:
+            from ai_manager.policy_export import export_with_parity
+            return export_with_parity(model, self.policy_path_for(version))
+        except Exception as e:
+            logger.error(f"NumPy policy export error ({version}): {e}")
+            return None
+
+    def _write_atomic(self, path, content):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def latest_version(self):
+        try:
+            with open(self.pointer_path) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        if version and os.path.exists(self.path_for(version)):
+            return version
+        return None
+
+    def latest_metadata(self):
+        version = self.latest_version()
+        if not version:
+            return {}
+        try:
+            with open(os.path.join(self.versions_dir, f"{version}.json")) as f:
+                return json.load(f).get('metadata', {})
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def list_versions(self):
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.versions_dir)
+                      if name.endswith('.zip') and not name.startswith('.'))
+
+    def prune(self, keep=5):
+        latest = self.latest_version()
+        removed = []
+        for version in self.list_versions()[:-keep] if keep > 0 else []:
+            if version == latest:
+                continue
+            for suffix in ('.zip', '.npz', '.json'):
+                try:
+                    os.remove(os.path.join(self.versions_dir, f"{version}{suffix}"))
+                except FileNotFoundError:
+                    pass
+            removed.append(version)
+        return removed
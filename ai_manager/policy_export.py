@@ -0,0 +1,98 @@
+import os
+import logging
+import numpy as np
+from ai_manager.features import STATE_DIM
+
+logger = logging.getLogger(__name__)
+
+PARITY_TOLERANCE = float(os.getenv('POLICY_PARITY_TOLERANCE', 1e-5))
+
+ACTIVATIONS = {
+    'Tanh': np.tanh,
+    'ReLU': lambda x: np.maximum(x, 0),
+    'Identity': lambda x: x,
+}
+
+
+def export_policy(model, path):
+    # Only the deterministic actor path is exported: flatten -> policy MLP -> action_net -> clip.
+    policy = model.policy
+    extractor = getattr(policy, 'pi_features_extractor', policy.features_extractor)
+    if type(extractor).__name__ != 'FlattenExtractor':
+        raise ValueError(f"Unsupported features extractor {type(extractor).__name__}")
+    if policy.squash_output:
+        raise ValueError("Squashed (gSDE) policies are not supported")
+    arrays = {}
+    activations = []
+    layer = 0
+    for module in list(policy.mlp_extractor.policy_net) + [policy.action_net]:
+        name = type(module).__name__
+        if name == 'Linear':
+            arrays[f"weight_{layer}"] = module.weight.detach().cpu().numpy().astype(np.float32)
+            arrays[f"bias_{layer}"] = module.bias.detach().cpu().numpy().astype(np.float32)
+            activations.append('Identity')
+            layer += 1
+        elif name in ACTIVATIONS and activations:
+            activations[-1] = name
+        else:
+            raise ValueError(f"Unsupported policy layer {name}")
+    space = model.action_space
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, activations=np.array(activations), action_low=space.low.astype(np.float32),
+             action_high=space.high.astype(np.float32), **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+class NumpyPolicy:
+    def __init__(self, layers, activations, action_low, action_high):
+        self.layers = layers
+        self.activations = [ACTIVATIONS[name] for name in activations]
+        self.action_low = action_low
+        self.action_high = action_high
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            activations = [str(name) for name in data['activations']]
+            layers = [(data[f"weight_{i}"].T.copy(), data[f"bias_{i}"].copy()) for i in range(len(activations))]
+            return cls(layers, activations, data['action_low'], data['action_high'])
+
+    def predict(self, observation, deterministic=True):
+        # Same call shape as PPO.predict so the engine can serve either backend.
+        x = np.asarray(observation, dtype=np.float32)
+        single = x.ndim == 1
+        x = x.reshape(-1, STATE_DIM)
+        for (weight, bias), activation in zip(self.layers, self.activations):
+            x = activation(x @ weight + bias)
+        actions = np.clip(x, self.action_low, self.action_high)
+        return (actions[0] if single else actions), None
+
+
+def check_parity(model, policy, n_samples=1024, seed=0):
+    rng = np.random.default_rng(seed)
+    observations = rng.exponential(1.0, size=(n_samples, STATE_DIM)).astype(np.float32)
+    expected, _ = model.predict(observations, deterministic=True)
+    actual, _ = policy.predict(observations)
+    return float(np.max(np.abs(expected - actual)))
+
+
+def export_with_parity(model, path, tolerance=None):
+    export_policy(model, path)
+    error = check_parity(model, NumpyPolicy.load(path))
+    if error > (PARITY_TOLERANCE if tolerance is None else tolerance):
+        os.remove(path)
+        raise ValueError(f"NumPy policy diverges from PPO.predict (max abs error {error:.2e})")
+    return error
+
+
+if __name__ == '__main__':
+    import sys
+    from stable_baselines3 import PPO
+    if len(sys.argv) < 2:
+        print("Usage: python -m ai_manager.policy_export <model.zip> [policy.npz]")
+        sys.exit(2)
+    model_file = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else f"{os.path.splitext(model_file)[0]}.npz"
+    error = export_with_parity(PPO.load(model_file), target)
+    print(f"✅ Exported {target} (max abs error {error:.2e})")
@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import fcntl
+import threading
+import logging
+from contextlib import contextmanager
+import numpy as np
+from ai_manager.features import STATE_DIM, ACTION_DIM, sample_from_scan_result
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    "features": (np.float32, (STATE_DIM,)),
+    "action": (np.float32, (ACTION_DIM,)),
+    "reward": (np.float32, ()),
+    "timestamp": (np.float64, ()),
+}
+
+
+class SampleStore:
+    def __init__(self, root=None, segment_size=None):
+        self.root = root or os.getenv('SAMPLE_STORE_PATH', 'data/samples')
+        self.segment_size = int(segment_size or os.getenv('SAMPLE_SEGMENT_SIZE', 65536))
+        self.index_path = os.path.join(self.root, 'index.json')
+        self._lock = threading.Lock()
+
+    # Several processes share one store (gunicorn workers, the spawned training
+    # process), so every lock is an flock on a file next to the index:
+    #   .lock    exclusive around any index/segment mutation
+    #   .owner   held (non-blocking) by whichever process ingests/maintains
+    #   .readers shared while reading segments; files are only deleted once
+    #            nobody holds it
+    @contextmanager
+    def _flock(self, name, operation, blocking=True):
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, name), 'a') as f:
+            try:
+                fcntl.flock(f.fileno(), operation | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _mutating(self):
+        with self._lock, self._flock('.lock', fcntl.LOCK_EX):
+            yield
+
+    def owner(self):
+        return self._flock('.owner', fcntl.LOCK_EX, blocking=False)
+
+    def _reading(self):
+        return self._flock('.readers', fcntl.LOCK_SH)
+
+    def _read_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"next_segment": 0, "segments": [], "watermark": None, "pending_delete": []}
+
+    def _write_index(self, index):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+
+    def _column_path(self, name, column):
+        return os.path.join(self.root, f"{name}.{column}.npy")
+
+    def _open_segment(self, name, mode='r'):
+        return {column: np.load(self._column_path(name, column), mmap_mode=mode) for column in COLUMNS}
+
+    def _new_segment(self, index, capacity):
+        os.makedirs(self.root, exist_ok=True)
+        name = f"seg-{index['next_segment']:08d}"
+        index['next_segment'] += 1
+        for column, (dtype, shape) in COLUMNS.items():
+            np.lib.format.open_memmap(
+                self._column_path(name, column), mode='w+', dtype=dtype, shape=(capacity,) + shape).flush()
+        return {"name": name, "start": 0, "count": 0, "capacity": capacity, "min_ts": None, "max_ts": None}
+
+    def _delete_segment_files(self, name):
+        for column in COLUMNS:
+            try:
+                os.remove(self._column_path(name, column))
+            except FileNotFoundError:
+                pass
+
+    def purge_retired(self):
+        # Segments dropped by retention/compaction stay on disk until no reader
+        # (e.g. a training process mid-epoch) can still be using them.
+        with self._mutating():
+            index = self._read_index()
+            names = index.get('pending_delete', [])
+            if not names:
+                return 0
+            with self._flock('.readers', fcntl.LOCK_EX, blocking=False) as idle:
+                if not idle:
+                    return 0
+                for name in names:
+                    self._delete_segment_files(name)
+            index['pending_delete'] = []
+            self._write_index(index)
+        return len(names)
+
+    def _append_locked(self, index, columns):
+        total = len(columns['reward'])
+        written = 0
+        while written < total:
+            segment = index['segments'][-1] if index['segments'] else None
+            if segment is None or segment['count'] >= segment['capacity']:
+                segment = self._new_segment(index, self.segment_size)
+                index['segments'].append(segment)
+            n = min(total - written, segment['capacity'] - segment['count'])
+            arrays = self._open_segment(segment['name'], mode='r+')
+            for column, values in columns.items():
+                arrays[column][segment['count']:segment['count'] + n] = values[written:written + n]
+                arrays[column].flush()
+            timestamps = columns['timestamp'][written:written + n]
+            segment['min_ts'] = float(timestamps.min()) if segment['min_ts'] is None else min(segment['min_ts'], float(timestamps.min()))
+            segment['max_ts'] = float(timestamps.max()) if segment['max_ts'] is None else max(segment['max_ts'], float(timestamps.max()))
+            segment['count'] += n
+            written += n
+        return written
+
+    def append(self, samples, watermark=None):
+        if not samples and watermark is None:
+            return 0
+        columns = {
+            column: np.asarray([sample[column] for sample in samples], dtype=dtype).reshape((len(samples),) + shape)
+            for column, (dtype, shape) in COLUMNS.items()
+        }
+        with self._mutating():
+            index = self._read_index()
+            written = self._append_locked(index, columns) if samples else 0
+            if watermark is not None:
+                index['watermark'] = watermark
+            self._write_index(index)
+        return written
+
+    def ingest_scan_results(self, collection, batch_size=1000):
+        # One ingesting process at a time; the rest skip this cycle rather than
+        # re-read from the same watermark and append the same scans twice.
+        with self.owner() as owned:
+            if not owned:
+                return 0
+            return self._ingest(collection, batch_size)
+
+    def _ingest(self, collection, batch_size):
+        from bson import ObjectId
+        watermark = self._read_index().get('watermark')
+        query = {"_id": {"$gt": ObjectId(watermark)}} if watermark else {}
+        cursor = collection.find(
+            query, {"state": 1, "logs.ai_params": 1, "vulnerabilities_found": 1, "scan_duration": 1, "timestamp": 1}
+        ).sort("_id", 1).batch_size(batch_size)
+        ingested = 0
+        batch = []
+        last_id = None
+        for doc in cursor:
+            last_id = str(doc['_id'])
+            sample = sample_from_scan_result(doc)
+            if sample is not None:
+                batch.append(sample)
+            if len(batch) >= batch_size:
+                ingested += self.append(batch, watermark=last_id)
+                batch = []
+        if last_id is not None:
+            ingested += self.append(batch, watermark=last_id)
+        if ingested:
+            logger.info(f"✅ Ingested {ingested} samples")
+        return ingested
+
+    def count(self):
+        return sum(segment['count'] - segment['start'] for segment in self._read_index()['segments'])
+
+    def iter_batches(self, batch_size=1024, shuffle=False, seed=None, columns=None):
+        with self._reading():
+            yield from self._iter_batches(batch_size, shuffle, seed, columns)
+
+    def _iter_batches(self, batch_size, shuffle, seed, columns):
+        columns = columns or list(COLUMNS)
+        rng = np.random.default_rng(seed)
+        blocks = []
+        for segment in self._read_index()['segments']:
+            for start in range(segment['start'], segment['count'], batch_size):
+                blocks.append((segment['name'], start, min(start + batch_size, segment['count'])))
+        if shuffle:
+            rng.shuffle(blocks)
+        opened = {}
+        for name, start, end in blocks:
+            if name not in opened:
+                opened = {name: self._open_segment(name)}
+            arrays = opened[name]
+            batch = {column: arrays[column][start:end] for column in columns}
+            if shuffle:
+                order = rng.permutation(end - start)
+                batch = {column: values[order] for column, values in batch.items()}
+            yield batch
+
+    def load_arrays(self, max_samples=None, columns=None):
+        with self._reading():
+            return self._load_arrays(max_samples, columns)
+
+    def _load_arrays(self, max_samples, columns):
+        columns = columns or list(COLUMNS)
+        chunks = {column: [] for column in columns}
+        remaining = max_samples
+        for segment in reversed(self._read_index()['segments']):
+            start = segment['start']
+            if remaining is not None:
+                start = max(start, segment['count'] - remaining)
+            arrays = self._open_segment(segment['name'])
+            for column in columns:
+                chunks[column].append(np.array(arrays[column][start:segment['count']]))
+            if remaining is not None:
+                remaining -= segment['count'] - start
+                if remaining <= 0:
+                    break
+        result = {}
+        for column in columns:
+            dtype, shape = COLUMNS[column]
+            parts = chunks[column][::-1]
+            result[column] = np.concatenate(parts) if parts else np.empty((0,) + shape, dtype=dtype)
+        return result
+
+    def apply_retention(self, max_age_days=None, max_samples=None):
+        with self._mutating():
+            index = self._read_index()
+            dropped = 0
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                for segment in index['segments']:
+                    if segment['max_ts'] is not None and segment['max_ts'] < cutoff:
+                        dropped += segment['count'] - segment['start']
+                        segment['start'] = segment['count']
+                    elif segment['min_ts'] is not None and segment['min_ts'] < cutoff and segment['count'] > segment['start']:
+                        timestamps = self._open_segment(segment['name'])['timestamp'][segment['start']:segment['count']]
+                        expired = int(np.searchsorted(timestamps, cutoff))
+                        segment['start'] += expired
+                        dropped += expired
+                        if expired < len(timestamps):
+                            segment['min_ts'] = float(timestamps[expired])
+            if max_samples is not None:
+                excess = sum(segment['count'] - segment['start'] for segment in index['segments']) - max_samples
+                for segment in index['segments']:
+                    if excess <= 0:
+                        break
+                    n = min(excess, segment['count'] - segment['start'])
+                    segment['start'] += n
+                    excess -= n
+                    dropped += n
+            removed = {segment['name'] for segment in index['segments'][:-1] if segment['start'] >= segment['count']}
+            index['segments'] = [segment for segment in index['segments'] if segment['name'] not in removed]
+            index.setdefault('pending_delete', []).extend(sorted(removed))
+            self._write_index(index)
+        self.purge_retired()
+        if dropped:
+            logger.info(f"🧹 Retention dropped {dropped} samples")
+        return dropped
+
+    def compact(self, min_fill=0.5):
+        with self._mutating():
+            index = self._read_index()
+            runs = []
+            current = []
+            live = 0
+            for segment in index['segments'][:-1]:
+                n = segment['count'] - segment['start']
+                sparse = n < segment['capacity'] * min_fill
+                if sparse and live + n <= self.segment_size:
+                    current.append(segment)
+                    live += n
+                    continue
+                if current:
+                    runs.append(current)
+                current, live = ([segment], n) if sparse else ([], 0)
+            if current:
+                runs.append(current)
+            if not runs:
+                return 0
+            replaced = {}
+            for run in runs:
+                parts = {column: [] for column in COLUMNS}
+                for segment in run:
+                    arrays = self._open_segment(segment['name'])
+                    for column in COLUMNS:
+                        parts[column].append(arrays[column][segment['start']:segment['count']])
+                    replaced[segment['name']] = []
+                columns = {column: np.concatenate(values) for column, values in parts.items()}
+                n = len(columns['reward'])
+                if not n:
+                    continue
+                merged = self._new_segment(index, n)
+                arrays = self._open_segment(merged['name'], mode='r+')
+                for column, values in columns.items():
+                    arrays[column][:] = values
+                    arrays[column].flush()
+                merged.update(count=n, min_ts=float(columns['timestamp'].min()), max_ts=float(columns['timestamp'].max()))
+                replaced[run[0]['name']] = [merged]
+            segments = []
+            for segment in index['segments']:
+                segments.extend(replaced.get(segment['name'], [segment]))
+            index['segments'] = segments
+            index.setdefault('pending_delete', []).extend(sorted(replaced))
+            self._write_index(index)
+        self.purge_retired()
+        logger.info(f"🧹 Compacted {len(replaced)} segments into {sum(len(run) > 0 for run in runs)}")
+        return len(replaced)
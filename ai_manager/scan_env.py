@@ -1,23 +1,55 @@
-import gym
-from gym import spaces
+import os
+import gymnasium as gym
+from gymnasium import spaces
 import numpy as np
 import logging
+from ai_manager.features import STATE_DIM, ACTION_DIM
+from ai_manager.sample_store import SampleStore
 
 logger = logging.getLogger(__name__)
 
 class AdvancedScanEnv(gym.Env):
-    def __init__(self):
+    def __init__(self, store=None, max_samples=None):
         super(AdvancedScanEnv, self).__init__()
-        self.action_space = spaces.MultiDiscrete([5, 10, 5, 5, 5])
-        self.observation_space = spaces.Box(low=0, high=1, shape=(20,), dtype=np.float32)
+        self.action_space = spaces.Box(low=0, high=1, shape=(ACTION_DIM,), dtype=np.float32)
+        self.observation_space = spaces.Box(low=0, high=np.inf, shape=(STATE_DIM,), dtype=np.float32)
+        self.store = store or SampleStore()
+        self.max_samples = max_samples or int(os.getenv('ENV_MAX_SAMPLES', 1000000))
+        self._index = 0
+        self._action = np.empty(ACTION_DIM, dtype=np.float32)
+        self._diff = np.empty(ACTION_DIM, dtype=np.float32)
+        self.update_with_new_data()
 
-    def reset(self):
-        return np.random.rand(20)
+    def _load(self, features, actions, rewards):
+        if len(rewards) == 0:
+            logger.warning("⚠️ No recorded scan outcomes, replay env has nothing to learn from")
+            features = np.zeros((1, STATE_DIM), dtype=np.float32)
+            actions = np.full((1, ACTION_DIM), 0.5, dtype=np.float32)
+            rewards = np.zeros(1, dtype=np.float32)
+        self.features = np.ascontiguousarray(features, dtype=np.float32)
+        self.actions = np.ascontiguousarray(actions, dtype=np.float32)
+        self.rewards = np.ascontiguousarray(rewards, dtype=np.float32)
+        self.n_samples = len(self.rewards)
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self._index = int(self.np_random.integers(self.n_samples))
+        return self.features[self._index], {}
 
     def step(self, action):
-        reward = np.random.uniform(-1, 10)
+        i = self._index
+        np.clip(action, 0, 1, out=self._action)
+        np.subtract(self._action, self.actions[i], out=self._diff)
+        np.abs(self._diff, out=self._diff)
+        reward = float(self.rewards[i]) * (1.0 - float(self._diff.mean()))
         done = True
-        return np.random.rand(20), reward, done, {}
+        return self.features[i], reward, done, False, {}
+
+    def batch_rewards(self, indices, actions):
+        similarity = 1.0 - np.abs(np.clip(actions, 0, 1) - self.actions[indices]).mean(axis=1)
+        return self.rewards[indices] * similarity
 
-    def update_with_new_data(self, new_data):
-        pass
+    def update_with_new_data(self, new_data=None):
+        if new_data is None:
+            new_data = self.store.load_arrays(self.max_samples, columns=['features', 'action', 'reward'])
+        self._load(new_data['features'], new_data['action'], new_data['reward'])
@@ -1,16 +1,45 @@
+import os
+import time
 import logging
 from datetime import datetime
+from ai_manager.genetic_algorithm import GeneticAlgorithmOptimizer
 
 logger = logging.getLogger(__name__)
 
 class SelfEvolutionManager:
-    def __init__(self):
+    def __init__(self, optimizer=None):
         self.improvement_cycles = 0
         self.performance_history = []
+        self.optimizer = optimizer
+        self.best_params = None
+        self.best_fitness = None
 
     def analyze_performance(self, recent_metrics):
         return False
 
     def execute_evolution_cycle(self, evaluate_function=None):
+        if evaluate_function is None:
+            from ai_manager.trainer import evaluate_hyperparameters
+            evaluate_function = evaluate_hyperparameters
+        if self.optimizer is None:
+            self.optimizer = GeneticAlgorithmOptimizer()
         self.improvement_cycles += 1
-        return {"status": "success", "best_fitness": 0.8, "improvement_cycles": self.improvement_cycles}
+        started = time.time()
+        best, best_fitness, history = self.optimizer.optimize_hyperparameters(
+            evaluate_function,
+            generations=int(os.getenv('GA_GENERATIONS', 5)),
+            population_size=int(os.getenv('GA_POPULATION_SIZE', 10))
+        )
+        for generation in history:
+            self.performance_history.append(dict(generation, cycle=self.improvement_cycles, timestamp=datetime.now().isoformat()))
+        if self.best_fitness is None or best_fitness > self.best_fitness:
+            self.best_params, self.best_fitness = best, best_fitness
+        duration = round(time.time() - started, 3)
+        logger.info(f"✅ Evolution cycle {self.improvement_cycles} finished in {duration}s (best={best_fitness:.4f})")
+        return {
+            "status": "success",
+            "best_fitness": best_fitness,
+            "best_params": best,
+            "duration": duration,
+            "improvement_cycles": self.improvement_cycles
+        }
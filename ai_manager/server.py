@@ -1,65 +1,210 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, request, jsonify
 from ai_manager.inference import AdvancedInferenceEngine
-from ai_manager.trainer import MetaLearningTrainer
 from ai_manager.self_evolution_manager import SelfEvolutionManager
+from ai_manager.batching import RequestCoalescer
+from ai_manager.training_jobs import TrainingJobQueue, TrainingQueueFull
+from monitoring import metrics
 import os
 import logging
 import threading
 import time
+from collections import deque
+import numpy as np
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-inference_engine = AdvancedInferenceEngine()
-trainer = MetaLearningTrainer()
-evolution_manager = SelfEvolutionManager()
+api = Blueprint('ai_manager', __name__)
+
+COALESCE_SUGGESTS = os.getenv('SUGGEST_COALESCE', '1') == '1'
+SUGGEST_BATCH_LIMIT = int(os.getenv('SUGGEST_BATCH_LIMIT', 256))
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 30))
+
+# Populated by create_app(); the trainer is only built when something needs it.
+inference_engine = None
+evolution_manager = None
+training_jobs = None
+suggest_coalescer = None
+_trainer = None
+_trainer_lock = threading.Lock()
+
+def get_trainer():
+    global _trainer
+    with _trainer_lock:
+        if _trainer is None:
+            from ai_manager.trainer import MetaLearningTrainer
+            _trainer = MetaLearningTrainer(n_envs=1, vec_env_kind='dummy')
+        return _trainer
+
+suggest_latencies = deque(maxlen=int(os.getenv('SUGGEST_LATENCY_WINDOW', 2048)))
+suggest_latency_lock = threading.Lock()
+
+def record_suggest_latency(started):
+    with suggest_latency_lock:
+        suggest_latencies.append((time.perf_counter() - started) * 1000)
+
+def latency_percentiles():
+    with suggest_latency_lock:
+        samples = np.array(suggest_latencies)
+    if not len(samples):
+        return {"count": 0, "p50": 0.0, "p90": 0.0, "p99": 0.0}
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {"count": len(samples), "p50": round(p50, 3), "p90": round(p90, 3), "p99": round(p99, 3)}
 
 def auto_training_loop():
     while True:
         try:
             time.sleep(86400)
-            stats = trainer.get_training_data_stats()
-            if stats['total_samples'] >= 100:
+            # Every gunicorn worker runs this loop; only the one dispatching
+            # training jobs submits, so there is one daily job, not one per worker.
+            if not training_jobs.is_dispatcher():
+                continue
+            stats = get_trainer().get_training_stats()
+            if stats['new_samples'] >= 100:
                 logger.info("Starting automatic training cycle")
-                trainer.continuous_learning({})
-                metrics = trainer.evaluate_performance()
-                evolution_manager.analyze_performance(metrics)
+                job, _ = training_jobs.submit(key='auto')
+                job = training_jobs.wait(job['job_id'])
+                if job and job['status'] == 'succeeded':
+                    evolution_manager.analyze_performance(job['result']['metrics'])
         except Exception as e:
             logger.error(f"Auto-training loop error: {e}")
             time.sleep(3600)
 
-threading.Thread(target=auto_training_loop, daemon=True).start()
+def sample_ingest_loop():
+    db = None
+    while True:
+        try:
+            time.sleep(float(os.getenv('SAMPLE_INGEST_INTERVAL', 300)))
+            if db is None:
+                from bot.database import DatabaseManager
+                db = DatabaseManager()
+            trainer = get_trainer()
+            trainer.ingest_scan_results(db.db.scan_results)
+            trainer.maintain_store()
+        except Exception as e:
+            logger.error(f"Sample ingest loop error: {e}")
+
+def create_app(start_background=None):
+    global inference_engine, evolution_manager, training_jobs, suggest_coalescer
+    started = time.perf_counter()
+    inference_engine = AdvancedInferenceEngine()
+    if MODEL_WATCH_INTERVAL > 0:
+        inference_engine.start_watcher(MODEL_WATCH_INTERVAL)
+    evolution_manager = SelfEvolutionManager()
+    training_jobs = TrainingJobQueue(
+        max_workers=int(os.getenv('TRAINING_WORKERS', 1)),
+        max_pending=int(os.getenv('TRAINING_MAX_PENDING', 4)),
+    )
+    suggest_coalescer = RequestCoalescer(
+        inference_engine.suggest_batch,
+        max_batch_size=int(os.getenv('SUGGEST_BATCH_MAX_SIZE', 32)),
+        max_wait_ms=float(os.getenv('SUGGEST_BATCH_MAX_WAIT_MS', 2)),
+    )
+    if start_background is None:
+        start_background = os.getenv('AI_BACKGROUND_LOOPS', '1') == '1'
+    if start_background:
+        training_jobs.start()
+        threading.Thread(target=auto_training_loop, daemon=True).start()
+        threading.Thread(target=sample_ingest_loop, daemon=True).start()
+    app = Flask(__name__)
+    app.register_blueprint(api)
+    logger.info(f"✅ AI manager app created in {time.perf_counter() - started:.2f}s")
+    return app
 
-@app.route('/suggest', methods=['POST'])
+@api.route('/suggest', methods=['POST'])
 def suggest_scan_params():
+    started = time.perf_counter()
     try:
         data = request.json
         if not data:
             return jsonify({"error": "No data provided"}), 400
-        suggestion = inference_engine.suggest(data)
+        if COALESCE_SUGGESTS:
+            suggestion = suggest_coalescer.submit(data, timeout=5)
+        else:
+            suggestion = inference_engine.suggest(data)
+        record_suggest_latency(started)
         return jsonify(suggestion)
     except Exception as e:
         logger.error(f"Suggest error: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/train', methods=['POST'])
+@api.route('/suggest_batch', methods=['POST'])
+def suggest_scan_params_batch():
+    try:
+        data = request.json
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "No items provided"}), 400
+        if len(items) > SUGGEST_BATCH_LIMIT:
+            return jsonify({"error": f"Batch too large (max {SUGGEST_BATCH_LIMIT})"}), 400
+        if not all(isinstance(item, dict) for item in items):
+            return jsonify({"error": "Each item must be an object"}), 400
+        return jsonify({"results": inference_engine.suggest_batch(items)})
+    except Exception as e:
+        logger.error(f"Suggest batch error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@api.route('/train', methods=['POST'])
 def train_model():
     try:
         data = request.json or {}
         force_retrain = data.get('force_retrain', False)
+        trainer = get_trainer()
+        trainer.add_sample(data)
         if force_retrain or trainer.should_retrain():
-            trainer.continuous_learning(data)
-            return jsonify({"status": "training_started", "message": "Training completed"})
+            job, coalesced = training_jobs.submit(key='force' if force_retrain else 'manual', force=force_retrain)
+            return jsonify({
+                "status": "training_queued",
+                "job_id": job['job_id'],
+                "coalesced": coalesced,
+                "message": "Training job submitted"
+            }), 202
         return jsonify({"status": "not_needed", "message": "No retraining needed"})
+    except TrainingQueueFull as e:
+        return jsonify({"error": str(e)}), 429
     except Exception as e:
         logger.error(f"Train error: {e}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/health', methods=['GET'])
+@api.route('/train/<job_id>', methods=['GET'])
+def train_job_status(job_id):
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@api.route('/train/<job_id>', methods=['DELETE'])
+@api.route('/train/<job_id>/cancel', methods=['POST'])
+def cancel_train_job(job_id):
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@api.route('/stats', methods=['GET'])
+def inference_stats():
+    return jsonify({
+        "model_version": inference_engine.get_model_version(),
+        "backend": inference_engine.serving_backend,
+        "cache": inference_engine.cache.stats(),
+        "suggest_latency_ms": latency_percentiles()
+    })
+
+@api.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/health', methods=['GET'])
 def health_check():
     return jsonify({"status": "healthy"})
 
+@api.route('/ready', methods=['GET'])
+def readiness_check():
+    ready = not (os.getenv('REQUIRE_MODEL', '0') == '1' and inference_engine.fallback_mode)
+    body = {"ready": ready, "model_version": inference_engine.get_model_version(),
+            "fallback_mode": inference_engine.fallback_mode}
+    return jsonify(body), 200 if ready else 503
+
 if __name__ == '__main__':
     port = int(os.getenv('AI_MANAGER_PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=False)
+    create_app().run(host='0.0.0.0', port=port, debug=False)
@@ -1,50 +1,175 @@
 import numpy as np
-from stable_baselines3 import PPO
-from ai_manager.scan_env import AdvancedScanEnv
+from ai_manager.model_registry import ModelRegistry
+from ai_manager.sample_store import SampleStore
+from ai_manager.features import sample_from_scan_result
 import os
+import json
 import logging
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+HYPERPARAMETERS_PATH = os.getenv(
+    'HYPERPARAMETERS_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'hyperparameters.json')
+)
+
+def load_hyperparameters(path=None):
+    try:
+        with open(path or HYPERPARAMETERS_PATH) as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Hyperparameters load error: {e}")
+        return {}
+
+def make_vec_env(n_envs=1, kind='subproc', env_fn=None):
+    # stable_baselines3 pulls in torch and gymnasium; only pay for it when an env is built.
+    from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
+    if env_fn is None:
+        from ai_manager.scan_env import AdvancedScanEnv
+        env_fn = AdvancedScanEnv
+    env_fns = [env_fn for _ in range(max(1, n_envs))]
+    if kind == 'subproc' and len(env_fns) > 1:
+        return SubprocVecEnv(env_fns)
+    return DummyVecEnv(env_fns)
+
+def ppo_kwargs_for(hyperparameters, n_envs):
+    kwargs = dict(hyperparameters)
+    if 'n_steps' in kwargs:
+        kwargs['n_steps'] = max(1, int(kwargs['n_steps']) // max(1, n_envs))
+    return kwargs
+
 class MetaLearningTrainer:
-    def __init__(self):
-        self.env = AdvancedScanEnv()
-        self.model = None
-        self.training_data = []
-        self.setup_model()
+    def __init__(self, n_envs=None, vec_env_kind=None, hyperparameters=None, resume=True):
+        self.n_envs = n_envs or int(os.getenv('TRAINER_NUM_ENVS', 1))
+        self.vec_env_kind = vec_env_kind or os.getenv('TRAINER_VEC_ENV', 'subproc')
+        self.hyperparameters = hyperparameters if hyperparameters is not None else load_hyperparameters()
+        self.ppo_kwargs = ppo_kwargs_for(self.hyperparameters, self.n_envs)
+        self._env = None
+        self._model = None
+        self.store = SampleStore()
+        self.min_new_samples = int(os.getenv('RETRAIN_MIN_NEW_SAMPLES', 10))
+        self.registry = ModelRegistry()
+        self.resume = resume
+
+    # The sample-store side (ingest, retrain checks, stats) needs neither the
+    # envs nor the PPO model, so both are built on first use.
+    @property
+    def env(self):
+        if self._env is None:
+            self._env = make_vec_env(self.n_envs, self.vec_env_kind)
+        return self._env
+
+    @property
+    def model(self):
+        if self._model is None:
+            self.setup_model()
+        return self._model
 
     def setup_model(self):
+        from stable_baselines3 import PPO
         try:
             model_path = os.getenv('MODEL_PATH', 'models/ppo_bug_bounty')
-            if os.path.exists(f"{model_path}.zip"):
-                self.model = PPO.load(model_path)
+            version = self.registry.latest_version() if self.resume else None
+            if version:
+                self._model = PPO.load(self.registry.path_for(version), env=self.env, custom_objects=self.ppo_kwargs)
+            elif self.resume and os.path.exists(f"{model_path}.zip"):
+                self._model = PPO.load(model_path, env=self.env, custom_objects=self.ppo_kwargs)
             else:
-                self.model = PPO("MlpPolicy", self.env)
-            logger.info("✅ Trainer ready")
+                self._model = PPO("MlpPolicy", self.env, **self.ppo_kwargs)
+            logger.info(f"✅ Trainer ready ({self.n_envs} {self.vec_env_kind} envs)")
         except Exception as e:
             logger.error(f"Trainer setup error: {e}")
 
-    def continuous_learning(self, data):
+    def add_sample(self, data):
+        sample = sample_from_scan_result(data) if data else None
+        if sample is not None:
+            self.store.append([sample])
+
+    def ingest_scan_results(self, collection):
+        return self.store.ingest_scan_results(collection)
+
+    def maintain_store(self):
+        max_age_days = float(os.getenv('SAMPLE_RETENTION_DAYS', 90))
+        max_samples = int(os.getenv('SAMPLE_MAX_SAMPLES', 5000000))
+        with self.store.owner() as owned:
+            if not owned:
+                return
+            self.store.apply_retention(max_age_days=max_age_days, max_samples=max_samples)
+            self.store.compact()
+
+    def iter_training_batches(self, batch_size=1024, shuffle=True):
+        return self.store.iter_batches(batch_size, shuffle=shuffle)
+
+    def continuous_learning(self, data, force=False, callback=None):
         try:
-            if data:
-                self.training_data.append(data)
-            if len(self.training_data) >= 10:
-                self.model.learn(total_timesteps=1000)
-                logger.info("✅ Model retrained")
+            self.add_sample(data)
+            if force or self.should_retrain():
+                self.model.learn(total_timesteps=1000, callback=callback)
+                if getattr(callback, 'cancelled', False):
+                    logger.warning("⚠️ Training cancelled, model not published")
+                    return False
+                version = self.registry.publish(self.model, metadata={"samples": self.store.count()})
+                logger.info(f"✅ Model retrained ({version})")
             return True
         except Exception as e:
             logger.error(f"Training error: {e}")
             return False
 
+    def new_samples(self):
+        return max(0, self.store.count() - int(self.registry.latest_metadata().get('samples', 0)))
+
     def should_retrain(self):
-        return len(self.training_data) >= 10
+        return self.new_samples() >= self.min_new_samples
+
+    def evaluate_policy(self, max_samples=10000):
+        from ai_manager.scan_env import AdvancedScanEnv
+        env = self.env.envs[0] if hasattr(self.env, 'envs') else AdvancedScanEnv()
+        n = min(env.n_samples, max_samples)
+        indices = np.arange(env.n_samples - n, env.n_samples)
+        actions, _ = self.model.predict(env.features[indices], deterministic=True)
+        return float(env.batch_rewards(indices, actions).mean())
 
-    def evaluate_performance(self):
-        return {"success_rate": 0.7, "average_reward": 5.0, "timestamp": datetime.now().isoformat()}
+    def evaluate_performance(self, batch_size=4096):
+        total = 0
+        successes = 0
+        reward_sum = 0.0
+        for batch in self.store.iter_batches(batch_size, columns=['reward']):
+            rewards = batch['reward']
+            total += len(rewards)
+            successes += int(np.count_nonzero(rewards > 0))
+            reward_sum += float(rewards.sum(dtype=np.float64))
+        return {
+            "success_rate": round(successes / total, 4) if total else 0.0,
+            "average_reward": round(reward_sum / total, 4) if total else 0.0,
+            "samples": total,
+            "timestamp": datetime.now().isoformat()
+        }
 
     def get_training_stats(self):
-        return {"training_cycles": len(self.training_data), "total_samples": len(self.training_data)}
+        total_samples = self.store.count()
+        return {
+            "training_cycles": len(self.registry.list_versions()),
+            "total_samples": total_samples,
+            "new_samples": self.new_samples()
+        }
 
     def is_ready(self):
         return self.model is not None
+
+    def close(self):
+        if self._env is None:
+            return
+        try:
+            self._env.close()
+        except Exception as e:
+            logger.error(f"Env close error: {e}")
+
+def evaluate_hyperparameters(params, budget=1.0):
+    trainer = MetaLearningTrainer(n_envs=1, vec_env_kind='dummy', hyperparameters=params, resume=False)
+    try:
+        timesteps = max(1, int(int(os.getenv('GA_EVAL_TIMESTEPS', 4096)) * budget))
+        trainer.model.learn(total_timesteps=timesteps)
+        return trainer.evaluate_policy()
+    finally:
+        trainer.close()
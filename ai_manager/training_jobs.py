@@ -0,0 +1,267 @@
+import os
+import json
+import uuid
+import time
+import fcntl
+import tempfile
+import threading
+import logging
+import multiprocessing
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+CANCELLING = 'cancelling'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class TrainingQueueFull(Exception):
+    pass
+
+
+def run_training_job(force, cancel_path):
+    from ai_manager.trainer import MetaLearningTrainer
+    from ai_manager.callbacks import CancellationCallback
+    trainer = MetaLearningTrainer()
+    try:
+        if not trainer.is_ready():
+            raise RuntimeError("Trainer model unavailable")
+        callback = CancellationCallback(cancel_path)
+        trained = trainer.continuous_learning({}, force=force, callback=callback)
+        return {
+            "trained": trained,
+            "cancelled": callback.cancelled,
+            "model_version": trainer.registry.latest_version(),
+            "metrics": trainer.evaluate_performance()
+        }
+    finally:
+        trainer.close()
+
+
+class TrainingJobQueue:
+    # Job state lives in <jobs_dir>/jobs.json, rewritten under an flock, so
+    # every gunicorn worker sees the same jobs, coalescing and pending bound.
+    # Only the worker holding <jobs_dir>/.dispatcher runs jobs; if it exits
+    # the lock is released and another worker's dispatcher thread takes over.
+    def __init__(self, max_workers=1, max_pending=4, history_size=100, jobs_dir=None, poll_interval=None):
+        self.max_workers = max(1, int(max_workers))
+        self.max_pending = max(1, int(max_pending))
+        self.history_size = history_size
+        self.jobs_dir = jobs_dir or os.getenv(
+            'TRAINING_JOBS_DIR', os.path.join(tempfile.gettempdir(), 'bug_bounty_training_jobs'))
+        self.registry_path = os.path.join(self.jobs_dir, 'jobs.json')
+        self.poll_interval = float(poll_interval or os.getenv('TRAINING_POLL_INTERVAL', 1.0))
+        self.running = {}
+        self._lock = threading.RLock()
+        self._executor = None
+        self._dispatcher_file = None
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _cancel_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.cancel")
+
+    def _read_jobs(self):
+        try:
+            with open(self.registry_path) as f:
+                return json.load(f, object_pairs_hook=OrderedDict)
+        except (FileNotFoundError, ValueError):
+            return OrderedDict()
+
+    @contextmanager
+    def _registry(self):
+        # Read-modify-write under an exclusive flock; readers never need the
+        # lock because the file is replaced atomically. Not re-entrant: flock
+        # is per open file, so a nested _registry() would wait on itself.
+        with self._lock:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            with open(os.path.join(self.jobs_dir, '.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    jobs = self._read_jobs()
+                    yield jobs
+                    tmp_path = f"{self.registry_path}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'w') as f:
+                        json.dump(jobs, f, default=str)
+                    os.replace(tmp_path, self.registry_path)
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def submit(self, key='manual', force=False):
+        with self._registry() as jobs:
+            queued = [job for job in jobs.values() if job['status'] == QUEUED]
+            for job in queued:
+                if job['key'] == key:
+                    job['force'] = job['force'] or force
+                    job['coalesced'] += 1
+                    return dict(job), True
+            if len(queued) >= self.max_pending:
+                raise TrainingQueueFull(f"Training queue is full ({self.max_pending} pending)")
+            job_id = uuid.uuid4().hex
+            job = jobs[job_id] = {
+                "job_id": job_id,
+                "key": key,
+                "force": force,
+                "status": QUEUED,
+                "coalesced": 0,
+                "submitted_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "worker_pid": None,
+                "result": None,
+                "error": None
+            }
+        # The submitting worker always competes for the dispatcher role, so a
+        # queued job is never left without a process to run it.
+        self.start()
+        self._wakeup.set()
+        return dict(job), False
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped.clear()
+                self._thread = threading.Thread(target=self._run, name="training-dispatcher", daemon=True)
+                self._thread.start()
+
+    def is_dispatcher(self):
+        return self._dispatcher_file is not None
+
+    def _acquire_dispatcher(self):
+        if self._dispatcher_file is not None:
+            return True
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        f = open(os.path.join(self.jobs_dir, '.dispatcher'), 'a')
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        self._dispatcher_file = f
+        logger.info(f"✅ Training dispatcher running in pid {os.getpid()}")
+        # Jobs still marked running belonged to a dispatcher that exited.
+        with self._registry() as jobs:
+            for job in jobs.values():
+                if job['status'] in (RUNNING, CANCELLING):
+                    self._finish(jobs, job, FAILED, error="Training worker exited before the job finished")
+        return True
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self._acquire_dispatcher():
+                    self._dispatch()
+            except Exception as e:
+                logger.error(f"Training dispatcher error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _dispatch(self):
+        started = []
+        with self._registry() as jobs:
+            for job in list(jobs.values()):
+                if len(self.running) >= self.max_workers:
+                    break
+                if job['status'] != QUEUED:
+                    continue
+                job_id = job['job_id']
+                try:
+                    future = self._get_executor().submit(run_training_job, job['force'], self._cancel_path(job_id))
+                except Exception as e:
+                    logger.error(f"Training job {job_id} dispatch error: {e}")
+                    self._finish(jobs, job, FAILED, error=str(e))
+                    continue
+                job['status'] = RUNNING
+                job['started_at'] = time.time()
+                job['worker_pid'] = os.getpid()
+                self.running[job_id] = future
+                started.append((job_id, future))
+        # Callbacks are attached outside the registry lock: one that fires
+        # immediately takes the lock again.
+        for job_id, future in started:
+            future.add_done_callback(lambda f, job_id=job_id: self._on_done(job_id, f))
+
+    def _on_done(self, job_id, future):
+        try:
+            result = future.result()
+            status, error = (CANCELLED if result.get('cancelled') else SUCCEEDED), None
+            logger.info(f"✅ Training job {job_id} {status}")
+        except Exception as e:
+            result, status, error = None, FAILED, str(e)
+            logger.error(f"Training job {job_id} failed: {e}")
+            if isinstance(e, BrokenProcessPool):
+                self._executor = None
+        try:
+            with self._registry() as jobs:
+                job = jobs.get(job_id)
+                if job is not None:
+                    self._finish(jobs, job, status, result=result, error=error)
+        except Exception as e:
+            logger.error(f"Training job {job_id} state update error: {e}")
+        finally:
+            self.running.pop(job_id, None)
+        try:
+            os.remove(self._cancel_path(job_id))
+        except FileNotFoundError:
+            pass
+        self._wakeup.set()
+
+    def _finish(self, jobs, job, status, result=None, error=None):
+        job['status'] = status
+        job['finished_at'] = time.time()
+        job['result'] = result
+        job['error'] = error
+        finished = [job_id for job_id, j in jobs.items() if j['status'] in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - self.history_size)]:
+            del jobs[job_id]
+
+    def get(self, job_id):
+        job = self._read_jobs().get(job_id)
+        return dict(job) if job else None
+
+    def cancel(self, job_id):
+        with self._registry() as jobs:
+            job = jobs.get(job_id)
+            if job is None:
+                return None
+            if job['status'] == QUEUED:
+                self._finish(jobs, job, CANCELLED)
+            elif job['status'] == RUNNING:
+                # The marker file is seen by the job whichever worker runs it.
+                open(self._cancel_path(job_id), 'w').close()
+                job['status'] = CANCELLING
+            return dict(job)
+
+    def wait(self, job_id, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in FINISHED_STATES:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(self.poll_interval)
+
+    def shutdown(self, wait=True):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+        if self._dispatcher_file is not None:
+            self._dispatcher_file.close()
+            self._dispatcher_file = None
@@ -0,0 +1,175 @@
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from bot.ai_client import AiClient, CircuitBreaker
+from bot.http_session import get_session
+
+STATE = {"target": "https://staging.example.com/api/item?id=1", "method": "POST", "param": "price"}
+
+
+class StubReplica:
+    # Local stand-in for one AI-manager replica: answers /suggest after
+    # `delay` seconds, or with `tail_delay` for a `tail_ratio` share of calls.
+    def __init__(self, name, delay=0.002, tail_ratio=0.0, tail_delay=0.0, status=200):
+        self.name = name
+        self.delay = delay
+        self.tail_ratio = tail_ratio
+        self.tail_delay = tail_delay
+        self.status = status
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.hits += 1
+                time.sleep(stub.tail_delay if random.random() < stub.tail_ratio else stub.delay)
+                body = json.dumps({"rate": 2000, "intensity": 0.7, "accuracy": 0.6, "timeout": 40,
+                                   "model_version": stub.name}).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, name=f"stub-{name}", daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def dead_url():
+    # A port that was bound and released, so connects are refused.
+    stub = StubReplica("dead")
+    stub.stop()
+    return stub.url
+
+
+def drive(client, requests_total, concurrency):
+    latencies = []
+    sources = Counter()
+    lock = threading.Lock()
+
+    def one(_):
+        start = time.perf_counter()
+        params = client.suggest_params(STATE)
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            sources[params.get("model_version")] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests_total)))
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "sources": dict(sources),
+    }
+
+
+def scenario_balanced(n, concurrency):
+    stubs = [StubReplica(f"r{i}", delay=0.005) for i in range(3)]
+    try:
+        result = drive(AiClient([s.url for s in stubs], session=get_session(), timeout=1), n, concurrency)
+        result["hits"] = {s.name: s.hits for s in stubs}
+        share = min(result["hits"].values()) / max(1, max(result["hits"].values()))
+        return result, [("load spread across replicas", share > 0.5), ("no fallbacks", "fallback" not in result["sources"])]
+    finally:
+        for s in stubs:
+            s.stop()
+
+
+def scenario_slow_tail(n, concurrency):
+    stubs = [StubReplica(f"r{i}", delay=0.003, tail_ratio=0.05, tail_delay=0.3) for i in range(2)]
+    try:
+        plain = drive(AiClient([s.url for s in stubs], session=get_session(), timeout=1, hedge=False), n, concurrency)
+        hedged = drive(AiClient([s.url for s in stubs], session=get_session(), timeout=1, hedge=True), n, concurrency)
+        return {"plain": plain, "hedged": hedged}, [("hedging cuts p99", hedged["p99_ms"] < plain["p99_ms"] / 2)]
+    finally:
+        for s in stubs:
+            s.stop()
+
+
+def scenario_replica_down(n, concurrency):
+    stub = StubReplica("r0")
+    try:
+        client = AiClient([stub.url, dead_url()], session=get_session(), timeout=1)
+        result = drive(client, n, concurrency)
+        result["breakers"] = [r.breaker.state for r in client.replicas]
+        return result, [("dead replica circuit open", result["breakers"][1] == "open"),
+                        ("no fallbacks", "fallback" not in result["sources"])]
+    finally:
+        stub.stop()
+
+
+def scenario_all_hanging(n, concurrency):
+    # Every replica stalls past the client timeout: after the breaker trips,
+    # callers get the fallback immediately instead of waiting out the timeout.
+    stubs = [StubReplica(f"r{i}", delay=2.0) for i in range(2)]
+    try:
+        client = AiClient([s.url for s in stubs], session=get_session(), timeout=0.2)
+        for replica in client.replicas:
+            replica.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        warmup = drive(client, 8, 1)
+        result = drive(client, n, concurrency)
+        result["warmup_max_ms"] = warmup["max_ms"]
+        result["breakers"] = [r.breaker.state for r in client.replicas]
+        return result, [("all circuits open", set(result["breakers"]) == {"open"}),
+                        ("fallback is immediate", result["p99_ms"] < 5)]
+    finally:
+        for s in stubs:
+            s.stop()
+
+
+SCENARIOS = {
+    "balanced": scenario_balanced,
+    "slow_tail": scenario_slow_tail,
+    "replica_down": scenario_replica_down,
+    "all_hanging": scenario_all_hanging,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AiClient against local stub replicas: balancing, circuit breaking, hedging")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"Comma-separated subset of {list(SCENARIOS)}")
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--json', dest='json_path', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    failed = []
+    for name in args.scenarios.split(','):
+        result, checks = SCENARIOS[name](args.requests, args.concurrency)
+        results[name] = result
+        print(f"{name}: {json.dumps(result)}")
+        for label, ok in checks:
+            print(f"  {'✅' if ok else '❌'} {label}")
+            if not ok:
+                failed.append(f"{name}: {label}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({"benchmark": "ai_client", "results": results, "failed": failed}, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
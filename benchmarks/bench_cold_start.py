@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ENTRY_POINTS = {
+    "ai_manager": "import ai_manager.server as m; m.create_app(start_background=False)",
+    "celery_worker": "import bot.tasks",
+    "bot": "import bot.bot",
+    "async_bot": "import bot.async_bot",
+    "dashboard": "import monitoring.dashboard",
+    "launcher": "import launcher",
+}
+HEAVY_MODULES = ["torch", "stable_baselines3", "gymnasium", "dash", "plotly", "celery", "pymongo", "telebot", "aiohttp"]
+
+PROBE = """
+import sys, time
+started = time.perf_counter()
+exec({code!r})
+elapsed = time.perf_counter() - started
+print("@@" + repr((elapsed, [name for name in {heavy!r} if name in sys.modules])))
+"""
+
+
+def parse_importtime(stderr, top=10, depth=1):
+    # Lines look like "import time:  <self us> | <cumulative us> | <module>", with the
+    # module indented two spaces per nesting level; depth 1 is what the entry module imports.
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not cumulative_us.strip().isdigit() or (len(name) - len(name.lstrip()) - 1) // 2 != depth:
+            continue
+        rows.append({"module": name.strip(), "cumulative_ms": round(int(cumulative_us) / 1000, 1)})
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+def measure(name, code, env=None):
+    child_env = dict(os.environ, MONGO_EXPLAIN_ON_STARTUP="0", MODEL_WATCH_INTERVAL="0", **(env or {}))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(code=code, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, env=child_env
+    )
+    marker = [line for line in result.stdout.splitlines() if line.startswith("@@")]
+    if result.returncode != 0 or not marker:
+        return {"entry_point": name, "error": result.stderr.strip().splitlines()[-1:] or result.returncode}
+    elapsed, heavy = eval(marker[-1][2:])
+    return {
+        "entry_point": name,
+        "startup_ms": round(elapsed * 1000, 1),
+        "heavy_modules": heavy,
+        "slowest_imports": parse_importtime(result.stderr),
+    }
+
+
+def run(entry_points=None):
+    return [measure(name, ENTRY_POINTS[name]) for name in (entry_points or ENTRY_POINTS)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time per component (fresh interpreter each)")
+    parser.add_argument('--only', help=f"Comma-separated subset of {list(ENTRY_POINTS)}")
+    parser.add_argument('--json', dest='json_path', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.only.split(',') if args.only else None)
+    for row in results:
+        if 'error' in row:
+            print(f"{row['entry_point']:<14} error: {row['error']}")
+            continue
+        print(f"{row['entry_point']:<14} {row['startup_ms']:>9} ms  heavy: {', '.join(row['heavy_modules']) or '-'}")
+        for item in row['slowest_imports'][:3]:
+            print(f"{'':<16}{item['cumulative_ms']:>9} ms  {item['module']}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({"benchmark": "cold_start", "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from ai_manager.features import STATE_DIM
+
+BATCH_SIZES = [1, 32, 256]
+
+# VmHWM rather than ru_maxrss: Linux carries ru_maxrss across exec, so a child
+# of this (torch-loaded) process would report the parent's peak.
+RSS_PROBE = """
+import sys, numpy as np
+from ai_manager.features import STATE_DIM
+backend, model_file = sys.argv[1], sys.argv[2]
+if backend == 'numpy':
+    from ai_manager.policy_export import NumpyPolicy
+    policy = NumpyPolicy.load(model_file[:-4] + '.npz')
+else:
+    from stable_baselines3 import PPO
+    policy = PPO.load(model_file)
+policy.predict(np.zeros(STATE_DIM, dtype=np.float32), deterministic=True)
+with open('/proc/self/status') as f:
+    print(next(line.split()[1] for line in f if line.startswith('VmHWM')))
+"""
+
+
+def latency_us(policy, batch_size, rounds):
+    observations = np.random.default_rng(0).exponential(1.0, size=(batch_size, STATE_DIM)).astype(np.float32)
+    single = observations[0] if batch_size == 1 else observations
+    policy.predict(single, deterministic=True)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        policy.predict(single, deterministic=True)
+    return round((time.perf_counter() - start) / rounds * 1e6, 2)
+
+
+def peak_rss_mb(backend, model_file):
+    result = subprocess.run([sys.executable, "-c", RSS_PROBE, backend, model_file], capture_output=True, text=True)
+    return round(int(result.stdout.strip().splitlines()[-1]) / 1024, 1) if result.returncode == 0 else None
+
+
+def run(model_file=None, rounds=2000, train_steps=0):
+    from stable_baselines3 import PPO
+    from ai_manager.policy_export import NumpyPolicy, export_with_parity
+    workdir = None
+    if model_file is None:
+        from ai_manager.trainer import MetaLearningTrainer
+        workdir = tempfile.mkdtemp(prefix="policy_bench_")
+        trainer = MetaLearningTrainer(n_envs=1, vec_env_kind='dummy', resume=False)
+        if train_steps:
+            trainer.model.learn(total_timesteps=train_steps)
+        model_file = os.path.join(workdir, "policy.zip")
+        trainer.model.save(model_file)
+        trainer.close()
+    model = PPO.load(model_file)
+    policy_file = f"{os.path.splitext(model_file)[0]}.npz"
+    parity = export_with_parity(model, policy_file)
+    numpy_policy = NumpyPolicy.load(policy_file)
+    rows = []
+    for batch_size in BATCH_SIZES:
+        rows.append({
+            "batch_size": batch_size,
+            "torch_us": latency_us(model, batch_size, rounds),
+            "numpy_us": latency_us(numpy_policy, batch_size, rounds),
+        })
+    return {
+        "parity_max_abs_error": parity,
+        "artifact_bytes": {"zip": os.path.getsize(model_file), "npz": os.path.getsize(policy_file)},
+        "peak_rss_mb": {"torch": peak_rss_mb("torch", model_file), "numpy": peak_rss_mb("numpy", model_file)},
+        "latency": rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PPO.predict vs NumPy policy: parity, latency and memory")
+    parser.add_argument('--model', help="PPO .zip to compare (default: a freshly initialised policy)")
+    parser.add_argument('--train-steps', type=int, default=0, help="Timesteps to train the fresh policy first")
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--json', dest='json_path', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.model, args.rounds, args.train_steps)
+    print(f"parity max abs error: {results['parity_max_abs_error']:.2e}")
+    print(f"artifact bytes: {results['artifact_bytes']}  peak RSS MB: {results['peak_rss_mb']}")
+    print(f"{'batch':>6} {'torch us':>10} {'numpy us':>10}")
+    for row in results['latency']:
+        print(f"{row['batch_size']:>6} {row['torch_us']:>10} {row['numpy_us']:>10}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({"benchmark": "policy_backend", "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import argparse
+import json
+import sys
+import time
+import numpy as np
+from ai_manager.inference import AdvancedInferenceEngine
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+METHODS = ['GET', 'POST', 'PUT', 'DELETE', 'PATCH']
+
+
+def sample_items(n, seed=0):
+    rng = np.random.default_rng(seed)
+    items = []
+    for i in range(n):
+        query = "?id=1" if rng.random() < 0.5 else ""
+        items.append({
+            "target": f"https://staging{i}.example.com/api/{'x' * int(rng.integers(1, 60))}{query}",
+            "method": METHODS[int(rng.integers(len(METHODS)))],
+            "param": "p" * int(rng.integers(1, 20))
+        })
+    return items
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 4)
+
+
+def bench_sequential(engine, batch_size, rounds, warm_cache=False):
+    items = sample_items(batch_size)
+    latencies = []
+    for _ in range(rounds):
+        if not warm_cache:
+            engine.cache.clear()
+        start = time.perf_counter()
+        for item in items:
+            engine.suggest(item)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_batched(engine, batch_size, rounds, warm_cache=False):
+    items = sample_items(batch_size)
+    latencies = []
+    for _ in range(rounds):
+        if not warm_cache:
+            engine.cache.clear()
+        start = time.perf_counter()
+        engine.suggest_batch(items)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def run(engine, batch_sizes=BATCH_SIZES, rounds=50, warm_cache=False):
+    results = []
+    for batch_size in batch_sizes:
+        engine.suggest_batch(sample_items(batch_size))
+        sequential = bench_sequential(engine, batch_size, rounds, warm_cache)
+        batched = bench_batched(engine, batch_size, rounds, warm_cache)
+        results.append({
+            "batch_size": batch_size,
+            "sequential_items_per_sec": round(batch_size * rounds / sum(sequential), 1),
+            "batched_items_per_sec": round(batch_size * rounds / sum(batched), 1),
+            "batched_p50_ms": percentile_ms(batched, 50),
+            "batched_p95_ms": percentile_ms(batched, 95),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput/latency of /suggest inference, single vs batched")
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--warm-cache', action='store_true', help="Keep the suggestion cache between rounds")
+    parser.add_argument('--json', dest='json_path', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    engine = AdvancedInferenceEngine()
+    if engine.fallback_mode:
+        print("No model found at MODEL_PATH; train or publish one before benchmarking", file=sys.stderr)
+        return 1
+    results = run(engine, rounds=args.rounds, warm_cache=args.warm_cache)
+    print(f"{'batch':>6} {'seq items/s':>12} {'batch items/s':>14} {'p50 ms':>9} {'p95 ms':>9}")
+    for row in results:
+        print(f"{row['batch_size']:>6} {row['sequential_items_per_sec']:>12} {row['batched_items_per_sec']:>14} "
+              f"{row['batched_p50_ms']:>9} {row['batched_p95_ms']:>9}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({"benchmark": "suggest", "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,352 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+os.environ.setdefault("MONGO_EXPLAIN_ON_STARTUP", "0")
+os.environ.setdefault("MODEL_WATCH_INTERVAL", "0")
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:BENCHMARK")
+os.environ.setdefault("AI_MANAGER_URL", "http://ai-manager.bench")
+
+import mongomock
+import fakeredis
+from benchmarks.bench_suggest import sample_items
+from benchmarks.fakes import (FakeTeleBot, FakeAsyncTeleBot, FlaskTestSession, TelegramApiSession,
+                              command_update, callback_update)
+
+SUITES = ['suggest', 'database', 'scan', 'bot']
+
+
+def summarize(latencies, ops_per_call=1):
+    samples = np.array(latencies)
+    return {
+        "n": len(samples),
+        "ops_per_sec": round(len(samples) * ops_per_call / samples.sum(), 1) if samples.sum() else None,
+        "p50_ms": round(float(np.percentile(samples, 50)) * 1000, 4),
+        "p95_ms": round(float(np.percentile(samples, 95)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(samples, 99)) * 1000, 4),
+    }
+
+
+def measure(fn, rounds, warmup=5, ops_per_call=1):
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, ops_per_call)
+
+
+def make_database(n_bounties):
+    from bot.database import DatabaseManager
+    db = DatabaseManager(client=mongomock.MongoClient())
+    db.db.bounties.insert_many([{
+        "title": f"Challenge {i:05d}",
+        "target": f"https://target{i}.example.com/api?id={i}",
+        "method": ["GET", "POST"][i % 2],
+        "param": "id",
+        "instructions": "Tamper with the id parameter and report a PoC",
+        "reward": 100 + i
+    } for i in range(n_bounties)])
+    return db
+
+
+_ai_app = None
+
+
+def ai_app():
+    global _ai_app
+    if _ai_app is None:
+        from ai_manager.server import create_app
+        _ai_app = create_app(start_background=False)
+    return _ai_app
+
+
+def bench_suggest_endpoint(rounds):
+    client = ai_app().test_client()
+    items = sample_items(256)
+    results = {}
+    results["suggest_single"] = measure(lambda: client.post('/suggest', json=items[0]), rounds)
+    for batch_size in (8, 64, 256):
+        batch = items[:batch_size]
+        results[f"suggest_batch_{batch_size}"] = measure(
+            lambda: client.post('/suggest_batch', json={"items": batch}), max(rounds // 4, 5), ops_per_call=batch_size)
+    return results
+
+
+def bench_database(db, rounds):
+    from bot.write_buffer import BufferedWriter
+    bounty = db.get_all_bounties()[0]
+    bounty_id = str(bounty['_id'])
+    results = {
+        "db_get_bounties_page": measure(lambda: db.get_bounties_page(limit=10), rounds),
+        "db_get_bounty_by_id": measure(lambda: db.get_bounty_by_id(bounty_id), rounds),
+        "db_get_system_stats": measure(db.get_system_stats, rounds),
+    }
+
+    def save_direct():
+        db.save_scan_result({"chat_id": 1, "bounty_id": bounty_id, "vulnerabilities_found": 1, "scan_duration": 5,
+                             "logs": {"duration": 5, "ai_params": {}}})
+        db.save_vulnerability({"type": "XSS", "severity": "High"})
+        db.update_bounty_stats(bounty_id, 1)
+
+    results["db_save_scan_direct"] = measure(save_direct, rounds)
+    results.update(bench_bounty_sync(rounds))
+    writer = BufferedWriter(db, max_items=64, max_interval=0.005)
+    try:
+        def save_buffered():
+            ticket = writer.add_scan({"chat_id": 1, "bounty_id": bounty_id, "vulnerabilities_found": 1, "scan_duration": 5,
+                                      "logs": {"duration": 5, "ai_params": {}}}, [{"type": "XSS", "severity": "High"}], bounty_id)
+            writer.commit(ticket)
+
+        results["db_save_scan_buffered"] = measure(save_buffered, rounds)
+    finally:
+        writer.close()
+    return results
+
+
+def bench_bounty_sync(rounds, n_entries=500):
+    from bot.database import DatabaseManager
+    from bot.bounty_sync import sync_bounties
+    # Separate catalog so the synced entries don't change the bot suite's numbers.
+    db = DatabaseManager(client=mongomock.MongoClient())
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "bounty_config.json")
+        with open(path, "w") as f:
+            json.dump({"bounties": [{"id": f"bench-{i:05d}", "title": f"Config {i:05d}", "target": f"https://cfg{i}.example.com",
+                                     "method": "GET", "param": "id", "instructions": "Report a PoC"}
+                                    for i in range(n_entries)]}, f)
+        results = {"db_bounty_sync_initial": measure(lambda: sync_bounties(db, path), 1, warmup=0)}
+        results["db_bounty_sync_noop"] = measure(lambda: sync_bounties(db, path), max(1, rounds // 20), warmup=1)
+    results["db_get_bounty_by_slug"] = measure(lambda: db.get_bounty_by_id("bench-00042"), rounds)
+    return results
+
+
+def wire_scan_pipeline(db):
+    import bot.tasks as tasks
+    import bot.ai_client as ai_client
+    import bot.notifier as notifier
+    import bot.write_buffer as write_buffer
+    tasks.app.conf.task_always_eager = True
+    tasks.db = db
+    tasks._redis, tasks._redis_pid = fakeredis.FakeRedis(), os.getpid()
+    ai_client._ai_client = ai_client.AiClient(os.environ["AI_MANAGER_URL"], session=FlaskTestSession(ai_app()))
+    ai_client._ai_client_pid = os.getpid()
+    notifier._notifier = notifier.NotificationService(session=TelegramApiSession(), global_rate=1e6, per_chat_interval=0,
+                                                      redis_client=tasks._redis)
+    notifier._notifier_pid = os.getpid()
+    write_buffer._writer = write_buffer.BufferedWriter(db)
+    write_buffer._writer_pid = os.getpid()
+    return tasks
+
+
+def bench_scan_task(db, rounds, concurrency):
+    tasks = wire_scan_pipeline(db)
+    bounty_ids = [str(bounty['_id']) for bounty in db.get_all_bounties()]
+    counter = iter(range(10 ** 9))
+    lock = threading.Lock()
+
+    def scan_once():
+        with lock:
+            i = next(counter)
+        bounty_id = bounty_ids[i % len(bounty_ids)]
+        if tasks.enqueue_scan(1000 + i % 50, bounty_id) is None:
+            raise RuntimeError(f"bounty {bounty_id} still locked")
+
+    results = {"scan_task_sequential": measure(scan_once, rounds)}
+    latencies = []
+
+    def timed_scan(_):
+        start = time.perf_counter()
+        scan_once()
+        return time.perf_counter() - start
+
+    # Threads sharing one process and one write buffer, as under the Celery
+    # threads pool the launcher runs scan workers on.
+    import bot.write_buffer as write_buffer
+    round_trips = write_buffer._writer.stats()["round_trips"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed_scan, range(rounds)))
+    elapsed = time.perf_counter() - start
+    concurrent = summarize(latencies)
+    concurrent["ops_per_sec"] = round(rounds / elapsed, 1)
+    concurrent["concurrency"] = concurrency
+    concurrent["db_round_trips_per_scan"] = round((write_buffer._writer.stats()["round_trips"] - round_trips) / rounds, 2)
+    results["scan_task_concurrent"] = concurrent
+    return results
+
+
+_prefork = {}
+
+
+def _prefork_init(n_bounties):
+    # Each child gets its own catalog, fake Redis, writer and AI app, like a
+    # Celery prefork child with its own connections. The parent's app must not
+    # be reused: its RequestCoalescer thread does not survive the fork.
+    global _ai_app
+    _ai_app = None
+    db = make_database(n_bounties)
+    _prefork.update(tasks=wire_scan_pipeline(db), bounty_ids=[str(b['_id']) for b in db.get_all_bounties()], db=db)
+
+
+def _prefork_scan(i):
+    import bot.write_buffer as write_buffer
+    tasks = _prefork['tasks']
+    bounty_id = _prefork['bounty_ids'][i % len(_prefork['bounty_ids'])]
+    start = time.perf_counter()
+    if tasks.enqueue_scan(1000 + i % 50, bounty_id) is None:
+        raise RuntimeError(f"bounty {bounty_id} still locked")
+    return time.perf_counter() - start, os.getpid(), write_buffer._writer.stats()["round_trips"]
+
+
+def bench_scan_prefork(rounds, processes, n_bounties):
+    # Prefork pool semantics: every child runs one task at a time, so a write
+    # buffer batch never holds more than that child's own scan.
+    with multiprocessing.get_context("fork").Pool(processes, initializer=_prefork_init, initargs=(n_bounties,)) as pool:
+        pool.map(_prefork_scan, range(processes * 2), chunksize=1)
+        start = time.perf_counter()
+        rows = pool.map(_prefork_scan, range(rounds), chunksize=1)
+        elapsed = time.perf_counter() - start
+    result = summarize([row[0] for row in rows])
+    first, last = {}, {}
+    for _, pid, round_trips in rows:
+        first.setdefault(pid, round_trips)
+        last[pid] = round_trips
+    per_child = {pid: (last[pid] - first[pid], sum(1 for row in rows if row[1] == pid) - 1) for pid in last}
+    trips, scans = sum(t for t, _ in per_child.values()), sum(n for _, n in per_child.values())
+    result.update(ops_per_sec=round(rounds / elapsed, 1), processes=processes,
+                  db_round_trips_per_scan=round(trips / scans, 2) if scans else None)
+    return {"scan_task_prefork": result}
+
+
+def bench_bot_dispatch(db, rounds):
+    from bot.bot import BugBountyBot
+    from bot.async_bot import AsyncBugBountyBot, ChatConcurrencyLimiter
+    from bot.catalog import CatalogCache
+    from bot.session import SessionCache
+    from bot.router import build_router
+    bounty_id = str(db.get_all_bounties()[0]['_id'])
+
+    sync_bot = BugBountyBot.__new__(BugBountyBot)
+    sync_bot.token = os.environ["TELEGRAM_TOKEN"]
+    sync_bot.bot = FakeTeleBot()
+    sync_bot.db = db
+    sync_bot.catalog = CatalogCache(db)
+    sync_bot.sessions = SessionCache()
+    sync_bot.router = build_router(sync_bot)
+    sync_bot.setup_handlers()
+    results = {}
+    for name, update in (
+            ("bot_sync_start", lambda: command_update(1, "/start")),
+            ("bot_sync_list_bounties", lambda: callback_update(1, "list_bounties")),
+            ("bot_sync_bounty_details", lambda: callback_update(1, f"bounty_{bounty_id}"))):
+        results[name] = measure(lambda: sync_bot.bot.process_new_updates([update()]), rounds)
+
+    def cold_details():
+        sync_bot.sessions.clear()
+        sync_bot.bot.process_new_updates([callback_update(1, f"bounty_{bounty_id}")])
+    results["bot_sync_bounty_details_cold"] = measure(cold_details, rounds)
+
+    async_bot = AsyncBugBountyBot.__new__(AsyncBugBountyBot)
+    async_bot.token = os.environ["TELEGRAM_TOKEN"]
+    async_bot.bot = FakeAsyncTeleBot()
+    async_bot.db = db
+    async_bot.catalog = CatalogCache(db)
+    async_bot.executor = ThreadPoolExecutor(max_workers=4)
+    async_bot.limiter = ChatConcurrencyLimiter()
+    async_bot.sessions = SessionCache()
+    async_bot.router = build_router(async_bot)
+    async_bot.setup_handlers()
+
+    loop = asyncio.new_event_loop()
+    try:
+        for name, update in (
+                ("bot_async_start", lambda: command_update(1, "/start")),
+                ("bot_async_list_bounties", lambda: callback_update(1, "list_bounties")),
+                ("bot_async_bounties_page", lambda: callback_update(1, "bounties_page_1")),
+                ("bot_async_bounty_details", lambda: callback_update(1, f"bounty_{bounty_id}"))):
+            results[name] = measure(lambda: loop.run_until_complete(async_bot.bot.process_new_updates([update()])), rounds)
+    finally:
+        loop.close()
+        async_bot.executor.shutdown(wait=False)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "commit": commit or None}
+
+
+def run(suites=SUITES, rounds=200, n_bounties=200, concurrency=16):
+    db = make_database(n_bounties)
+    results = {}
+    if 'suggest' in suites:
+        results.update(bench_suggest_endpoint(rounds))
+    if 'database' in suites:
+        results.update(bench_database(db, rounds))
+    if 'scan' in suites:
+        results.update(bench_scan_task(db, rounds, concurrency))
+        results.update(bench_scan_prefork(rounds, max(2, min(concurrency, 4)), n_bounties))
+    if 'bot' in suites:
+        results.update(bench_bot_dispatch(db, rounds))
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, row in results.items():
+        before = baseline.get(name, {}).get("p50_ms")
+        if before and row["p50_ms"] > before * (1 + tolerance):
+            regressions.append({"name": name, "baseline_p50_ms": before, "p50_ms": row["p50_ms"],
+                                "ratio": round(row["p50_ms"] / before, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite (mongomock, fakeredis, eager Celery, fake TeleBot)")
+    parser.add_argument('--suites', default=','.join(SUITES), help=f"Comma-separated subset of {SUITES}")
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--bounties', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16, help="Threads for the concurrent scan benchmark")
+    parser.add_argument('--json', dest='json_path', help="Write results to this JSON file")
+    parser.add_argument('--baseline', help="Previous --json output to compare p50 latencies against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p50 slowdown before flagging a regression")
+    args = parser.parse_args()
+
+    results = run([suite for suite in args.suites.split(',') if suite], args.rounds, args.bounties, args.concurrency)
+    print(f"{'benchmark':<28} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in results.items():
+        print(f"{name:<28} {row['ops_per_sec']:>10} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+    output = {"benchmark": "suite", "environment": environment(), "results": results}
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            output["regressions"] = compare(results, json.load(f).get("results", {}), args.tolerance)
+        for regression in output["regressions"]:
+            print(f"⚠️ {regression['name']}: p50 {regression['baseline_p50_ms']} -> {regression['p50_ms']} ms "
+                  f"(x{regression['ratio']})", file=sys.stderr)
+        status = 1 if output["regressions"] else 0
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(output, f, indent=2)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
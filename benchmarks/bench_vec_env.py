@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from ai_manager.trainer import make_vec_env
+
+KINDS = ['dummy', 'subproc']
+
+
+def default_worker_counts():
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    return counts
+
+
+def bench_env_steps(n_envs, kind, steps):
+    env = make_vec_env(n_envs, kind)
+    try:
+        env.reset()
+        actions = np.stack([env.action_space.sample() for _ in range(n_envs)])
+        env.step(actions)
+        start = time.perf_counter()
+        for _ in range(steps):
+            env.step(actions)
+        elapsed = time.perf_counter() - start
+    finally:
+        env.close()
+    return n_envs * steps / elapsed
+
+
+def run(worker_counts=None, kinds=KINDS, steps=2000):
+    results = []
+    for kind in kinds:
+        for n_envs in worker_counts or default_worker_counts():
+            results.append({
+                "kind": kind,
+                "n_envs": n_envs,
+                "env_steps_per_sec": round(bench_env_steps(n_envs, kind, steps), 1)
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Env-steps/sec of vectorized AdvancedScanEnv against worker count")
+    parser.add_argument('--steps', type=int, default=2000, help="Vector steps per measurement")
+    parser.add_argument('--workers', type=int, nargs='*', help="Worker counts to measure (default: powers of two up to cpu_count)")
+    parser.add_argument('--kind', choices=KINDS, action='append', help="Vectorization variant(s) to measure")
+    parser.add_argument('--json', dest='json_path', help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.workers, args.kind or KINDS, args.steps)
+    print(f"{'kind':>8} {'n_envs':>7} {'env-steps/s':>12}")
+    for row in results:
+        print(f"{row['kind']:>8} {row['n_envs']:>7} {row['env_steps_per_sec']:>12}")
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({"benchmark": "vec_env", "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
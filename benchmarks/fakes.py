@@ -0,0 +1,112 @@
+import time
+import itertools
+from urllib.parse import urlsplit
+from telebot import TeleBot, types
+from telebot.async_telebot import AsyncTeleBot
+
+FAKE_TOKEN = "123456:BENCHMARK"
+
+
+class RecordingTransport:
+    def __init__(self):
+        self.calls = []
+
+    def record(self, method, **kwargs):
+        self.calls.append((method, kwargs))
+        return {"ok": True}
+
+
+class FakeTeleBot(TeleBot):
+    def __init__(self, transport=None):
+        super().__init__(FAKE_TOKEN, threaded=False)
+        self.transport = transport or RecordingTransport()
+
+    def send_message(self, chat_id, text, **kwargs):
+        return self.transport.record("sendMessage", chat_id=chat_id, text=text, **kwargs)
+
+    def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        return self.transport.record("editMessageText", chat_id=chat_id, message_id=message_id, text=text, **kwargs)
+
+    def answer_callback_query(self, callback_query_id, text=None, **kwargs):
+        return self.transport.record("answerCallbackQuery", callback_query_id=callback_query_id, text=text)
+
+    def get_me(self):
+        return self.transport.record("getMe")
+
+
+class FakeAsyncTeleBot(AsyncTeleBot):
+    def __init__(self, transport=None):
+        super().__init__(FAKE_TOKEN)
+        self.transport = transport or RecordingTransport()
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return self.transport.record("sendMessage", chat_id=chat_id, text=text, **kwargs)
+
+    async def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        return self.transport.record("editMessageText", chat_id=chat_id, message_id=message_id, text=text, **kwargs)
+
+    async def answer_callback_query(self, callback_query_id, text=None, **kwargs):
+        return self.transport.record("answerCallbackQuery", callback_query_id=callback_query_id, text=text)
+
+    async def get_me(self):
+        return self.transport.record("getMe")
+
+
+_update_ids = itertools.count(1)
+
+
+def _chat_user(chat_id):
+    return {"id": chat_id, "type": "private", "first_name": "bench"}, {"id": chat_id, "is_bot": False, "first_name": "bench"}
+
+
+def command_update(chat_id, text):
+    chat, user = _chat_user(chat_id)
+    return types.Update.de_json({"update_id": next(_update_ids), "message": {
+        "message_id": 1, "date": int(time.time()), "chat": chat, "from": user, "text": text,
+        "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    }})
+
+
+def callback_update(chat_id, data):
+    chat, user = _chat_user(chat_id)
+    return types.Update.de_json({"update_id": next(_update_ids), "callback_query": {
+        "id": str(next(_update_ids)), "from": user, "chat_instance": str(chat_id), "data": data,
+        "message": {"message_id": 1, "date": int(time.time()), "chat": chat, "text": "menu"}
+    }})
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.headers = {}
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FlaskTestSession:
+    # requests.Session stand-in that routes calls into a Flask test client.
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def post(self, url, json=None, timeout=None):
+        response = self.client.post(urlsplit(url).path, json=json)
+        return FakeResponse(response.status_code, response.get_json())
+
+    def get(self, url, timeout=None, **kwargs):
+        response = self.client.get(urlsplit(url).path)
+        return FakeResponse(response.status_code, response.get_json())
+
+
+class TelegramApiSession:
+    def __init__(self, transport=None):
+        self.transport = transport or RecordingTransport()
+
+    def post(self, url, json=None, timeout=None):
+        self.transport.record(url.rsplit('/', 1)[-1], **(json or {}))
+        return FakeResponse(200, {"ok": True})
@@ -0,0 +1,195 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from bot.http_session import get_session
+from monitoring.metrics import count
+
+logger = logging.getLogger(__name__)
+
+AI_CLIENT_TIMEOUT = float(os.getenv("AI_CLIENT_TIMEOUT", 3))
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", 5))
+AI_BREAKER_RESET = float(os.getenv("AI_BREAKER_RESET", 30))
+AI_HEDGE_ENABLED = os.getenv("AI_HEDGE", "0") == "1"
+AI_HEDGE_MIN_DELAY = float(os.getenv("AI_HEDGE_MIN_DELAY", 0.05))
+AI_LATENCY_WINDOW = int(os.getenv("AI_LATENCY_WINDOW", 256))
+
+# Mirrors AdvancedInferenceEngine.get_fallback_params so a scan gets the same
+# parameters whether the server or the client decided to fall back.
+FALLBACK_PARAMS = {"rate": 1000, "intensity": 0.5, "accuracy": 0.5, "timeout": 45, "model_version": "fallback"}
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or AI_BREAKER_FAILURES
+        self.reset_timeout = reset_timeout or AI_BREAKER_RESET
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            # Half-open lets a single probe through; its outcome closes or re-opens.
+            if self.state == "half_open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures, self.probing = "closed", 0, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning(f"⚠️ AI replica circuit open after {self.failures} failures")
+                self.state, self.opened_at, self.probing = "open", time.monotonic(), False
+
+
+class Replica:
+    def __init__(self, base_url, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.breaker = breaker or CircuitBreaker()
+        self.outstanding = 0
+        self.latencies = deque(maxlen=AI_LATENCY_WINDOW)
+
+    def p95(self):
+        samples = sorted(self.latencies)
+        return samples[int(len(samples) * 0.95)] if len(samples) >= 20 else None
+
+
+class AiClient:
+    def __init__(self, base_urls, session=None, timeout=None, hedge=None):
+        if isinstance(base_urls, str):
+            base_urls = base_urls.split(',')
+        self.replicas = [Replica(url.strip()) for url in base_urls if url and url.strip()]
+        if not self.replicas:
+            raise ValueError("AI_MANAGER_URL(S) not configured")
+        self.session = session or get_session()
+        self.timeout = timeout or AI_CLIENT_TIMEOUT
+        self.hedge = AI_HEDGE_ENABLED if hedge is None else hedge
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def base_url(self):
+        return self.replicas[0].base_url
+
+    def pick(self, exclude=None):
+        # Least outstanding requests among replicas whose breaker admits a call;
+        # ties are broken randomly so idle replicas share the load.
+        with self._lock:
+            candidates = [r for r in self.replicas if r is not exclude]
+            random.shuffle(candidates)
+            candidates.sort(key=lambda r: r.outstanding)
+            for replica in candidates:
+                if replica.breaker.allow():
+                    replica.outstanding += 1
+                    return replica
+        return None
+
+    def _call(self, replica, state):
+        start = time.perf_counter()
+        try:
+            response = self.session.post(f"{replica.base_url}/suggest", json=state, timeout=self.timeout)
+            if response.status_code >= 500:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            replica.breaker.record_success()
+            replica.latencies.append(time.perf_counter() - start)
+            return response.json() if response.status_code == 200 else None
+        except Exception as e:
+            replica.breaker.record_failure()
+            logger.error(f"AI suggest error ({replica.base_url}): {e}")
+            raise
+        finally:
+            with self._lock:
+                replica.outstanding -= 1
+
+    def hedge_delay(self, replica):
+        p95 = replica.p95()
+        return max(AI_HEDGE_MIN_DELAY, p95) if p95 is not None else self.timeout / 2
+
+    def _submit(self, replica, state):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=int(os.getenv("AI_HEDGE_WORKERS", 16)), thread_name_prefix="ai-hedge")
+        return self._executor.submit(self._call, replica, state)
+
+    def _hedged(self, primary, state):
+        # A second replica is asked once the primary is slower than its usual
+        # p95 (or has already failed); the first good answer wins.
+        deadline = time.monotonic() + self.timeout
+        done, pending = wait({self._submit(primary, state)}, timeout=self.hedge_delay(primary))
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+        backup = self.pick(exclude=primary)
+        if backup is not None:
+            count('ai_client_hedges_total')
+            pending.add(self._submit(backup, state))
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        return None
+
+    def _with_failover(self, primary, state):
+        try:
+            return self._call(primary, state)
+        except Exception:
+            backup = self.pick(exclude=primary)
+            if backup is None:
+                return None
+        try:
+            return self._call(backup, state)
+        except Exception:
+            return None
+
+    def suggest_params(self, state):
+        replica = self.pick()
+        if replica is None:
+            count('ai_client_requests_total', outcome='circuit_open')
+            return self.get_fallback_params()
+        if self.hedge and len(self.replicas) > 1:
+            params = self._hedged(replica, state)
+        else:
+            params = self._with_failover(replica, state)
+        count('ai_client_requests_total', outcome='ok' if params else 'fallback')
+        return params or self.get_fallback_params()
+
+    def get_fallback_params(self):
+        return dict(FALLBACK_PARAMS)
+
+    def stats(self):
+        stats = []
+        for replica in self.replicas:
+            p95 = replica.p95()
+            stats.append({"url": replica.base_url, "outstanding": replica.outstanding, "breaker": replica.breaker.state,
+                          "p95_ms": round(p95 * 1000, 2) if p95 is not None else None})
+        return stats
+
+
+_ai_client = None
+_ai_client_pid = None
+
+
+def get_ai_client():
+    global _ai_client, _ai_client_pid
+    if _ai_client is None or _ai_client_pid != os.getpid():
+        _ai_client, _ai_client_pid = AiClient(os.getenv("AI_MANAGER_URLS") or os.getenv("AI_MANAGER_URL")), os.getpid()
+    return _ai_client
@@ -0,0 +1,292 @@
+import os
+import asyncio
+import logging
+import functools
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from aiohttp import web
+from telebot import types
+from telebot.async_telebot import AsyncTeleBot
+from bot.database import DatabaseManager
+from bot.tasks import enqueue_scan
+from bot.views import (main_menu_keyboard, bounty_list_keyboard, bounty_list_text, bounty_details, system_status_text,
+                       system_stats_text, model_status_text, manual_report, REPORT_USAGE, ADD_BOUNTY_TEXT)
+from bot.catalog import CatalogCache
+from bot.bounty_sync import sync_on_startup
+from bot.router import build_router
+from bot.session import SessionCache
+from monitoring.metrics import instrument_methods
+
+logger = logging.getLogger(__name__)
+
+HANDLER_METHODS = ['show_main_menu', 'list_bounties', 'show_bounty_details', 'start_scan', 'show_system_status',
+                   'handle_callback_query', 'handle_manual_report']
+
+
+class ChatConcurrencyLimiter:
+    def __init__(self, per_chat=2, max_chats=10000):
+        self.per_chat = per_chat
+        self.max_chats = max_chats
+        self._chats = OrderedDict()
+
+    def _evict(self):
+        excess = len(self._chats) - self.max_chats
+        for chat_id in list(self._chats):
+            if excess <= 0:
+                break
+            if self._chats[chat_id][1] == 0:
+                del self._chats[chat_id]
+                excess -= 1
+
+    @asynccontextmanager
+    async def limit(self, chat_id):
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            entry = self._chats[chat_id] = [asyncio.Semaphore(self.per_chat), 0]
+            self._evict()
+        else:
+            self._chats.move_to_end(chat_id)
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+
+
+class AsyncBugBountyBot:
+    def __init__(self):
+        self.token = os.getenv("TELEGRAM_TOKEN")
+        if not self.token:
+            raise ValueError("TELEGRAM_TOKEN not found")
+        self.bot = AsyncTeleBot(self.token)
+        self.db = None
+        self.catalog = None
+        self.executor = ThreadPoolExecutor(max_workers=int(os.getenv('BOT_IO_WORKERS', 32)), thread_name_prefix="bot-io")
+        self.limiter = ChatConcurrencyLimiter(
+            per_chat=int(os.getenv('BOT_PER_CHAT_CONCURRENCY', 2)),
+            max_chats=int(os.getenv('BOT_MAX_TRACKED_CHATS', 10000))
+        )
+        self.sessions = SessionCache()
+        self.router = build_router(self)
+        self.setup_handlers()
+
+    async def run_blocking(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def connect_database(self):
+        self.db = DatabaseManager()
+        await self.run_blocking(self.db.connect_with_retry)
+        await self.run_blocking(sync_on_startup, self.db)
+        self.catalog = CatalogCache(self.db)
+        await self.run_blocking(self.catalog.start_change_stream)
+        logger.info("✅ Database connected")
+
+    def setup_handlers(self):
+        @self.bot.message_handler(commands=['start', 'help'])
+        async def send_welcome(message):
+            async with self.limiter.limit(message.chat.id):
+                await self.show_main_menu(message.chat.id)
+
+        @self.bot.message_handler(commands=['report'])
+        async def handle_report(message):
+            async with self.limiter.limit(message.chat.id):
+                await self.handle_manual_report(message)
+
+        @self.bot.message_handler(commands=['status'])
+        async def handle_status(message):
+            async with self.limiter.limit(message.chat.id):
+                await self.show_system_status(message.chat.id)
+
+        @self.bot.callback_query_handler(func=lambda call: True)
+        async def handle_callback(call):
+            async with self.limiter.limit(call.message.chat.id):
+                await self.handle_callback_query(call)
+
+    async def handle_callback_query(self, call):
+        await self.router.dispatch(call)
+
+    async def unavailable(self, call):
+        await self.bot.answer_callback_query(call.id, "Not available yet")
+
+    async def load_bounty(self, chat_id, bounty_id):
+        bounty = self.sessions.get_bounty(chat_id, bounty_id)
+        if bounty is None:
+            bounty = await self.run_blocking(self.db.get_bounty_by_id, bounty_id)
+            if bounty:
+                self.sessions.set_bounty(chat_id, bounty_id, bounty)
+        return bounty
+
+    async def show_system_status_callback(self, call):
+        await self.show_system_status(call.message.chat.id)
+
+    async def edit_main_menu(self, call):
+        await self.bot.edit_message_text("Welcome! Choose from the menu:", call.message.chat.id, call.message.message_id, reply_markup=main_menu_keyboard())
+
+    async def show_main_menu(self, chat_id):
+        await self.bot.send_message(chat_id, "Welcome! Choose from the menu:", reply_markup=main_menu_keyboard())
+
+    async def list_bounties(self, call):
+        try:
+            page = int(call.data.rsplit("_", 1)[1]) if call.data.startswith("bounties_page_") else 0
+            bounties, page, total_pages = await self.run_blocking(self.catalog.page, page)
+            if not bounties:
+                await self.bot.edit_message_text("No challenges yet. Tap ➕ to add one.", call.message.chat.id, call.message.message_id)
+                return
+            keyboard = bounty_list_keyboard(bounties, page, total_pages)
+            await self.bot.edit_message_text(bounty_list_text(page, total_pages), call.message.chat.id, call.message.message_id, reply_markup=keyboard)
+        except Exception as e:
+            logger.error(f"List bounties error: {e}")
+
+    async def show_bounty_details(self, call):
+        try:
+            bounty_id = call.data.split("_", 1)[1]
+            bounty = await self.load_bounty(call.message.chat.id, bounty_id)
+            if not bounty:
+                await self.bot.answer_callback_query(call.id, "❌ Challenge not found")
+                return
+            text, keyboard = bounty_details(bounty, bounty_id)
+            await self.bot.edit_message_text(text, call.message.chat.id, call.message.message_id, reply_markup=keyboard)
+        except Exception as e:
+            logger.error(f"Show bounty details error: {e}")
+
+    async def start_scan(self, call):
+        try:
+            bounty_id = call.data.split("_", 1)[1]
+            bounty = await self.load_bounty(call.message.chat.id, bounty_id)
+            if not bounty:
+                await self.bot.answer_callback_query(call.id, "❌ Challenge not found")
+                return
+            if not await self.run_blocking(enqueue_scan, call.message.chat.id, bounty['_id']):
+                await self.bot.answer_callback_query(call.id, "⏳ A scan of this challenge is already running")
+                return
+            self.sessions.set_bounty(call.message.chat.id, bounty_id)
+            await self.bot.edit_message_text("🔄 Smart scan started...", call.message.chat.id, call.message.message_id)
+        except Exception as e:
+            logger.error(f"Start scan error: {e}")
+
+    async def show_stats(self, call):
+        try:
+            stats = await self.run_blocking(self.db.get_system_stats)
+            await self.bot.send_message(call.message.chat.id, system_stats_text(stats))
+        except Exception as e:
+            logger.error(f"Stats error: {e}")
+
+    async def add_bounty(self, call):
+        await self.bot.answer_callback_query(call.id, ADD_BOUNTY_TEXT, show_alert=True)
+
+    async def show_model_status(self, call):
+        try:
+            response = await self.run_blocking(requests.get, f"{os.getenv('AI_MANAGER_URL')}/stats", timeout=5)
+            await self.bot.answer_callback_query(call.id, model_status_text(response.json()))
+        except Exception as e:
+            logger.error(f"Model status error: {e}")
+            await self.bot.answer_callback_query(call.id, "❌ AI Manager unavailable")
+
+    async def handle_manual_report(self, message):
+        try:
+            details = (message.text or "").partition(" ")[2].strip()
+            bounty_id = self.sessions.current_bounty_id(message.chat.id)
+            if not details or not bounty_id:
+                await self.bot.send_message(message.chat.id, REPORT_USAGE)
+                return
+            await self.run_blocking(self.db.save_vulnerability, manual_report(bounty_id, message.chat.id, details))
+            await self.bot.send_message(message.chat.id, "✅ Report saved")
+        except Exception as e:
+            logger.error(f"Manual report error: {e}")
+
+    async def show_system_status(self, chat_id):
+        try:
+            services_status = await self.check_services_status()
+            await self.bot.send_message(chat_id, system_status_text(services_status))
+        except Exception as e:
+            logger.error(f"System status error: {e}")
+
+    async def check_services_status(self):
+        async def mongo():
+            await self.run_blocking(self.db.ping)
+
+        async def telegram():
+            await self.bot.get_me()
+
+        async def ai_manager():
+            response = await self.run_blocking(requests.get, f"{os.getenv('AI_MANAGER_URL')}/health", timeout=5)
+            if response.status_code != 200:
+                raise RuntimeError(response.status_code)
+
+        services = {'MongoDB': mongo, 'Redis': telegram, 'AI Manager': ai_manager}
+        results = await asyncio.gather(*(check() for check in services.values()), return_exceptions=True)
+        return {
+            service: {'status': not isinstance(result, Exception), 'message': 'Error' if isinstance(result, Exception) else 'Healthy'}
+            for service, result in zip(services, results)
+        }
+
+    def create_webhook_app(self, path=None, secret=None):
+        path = path or os.getenv('WEBHOOK_PATH', f"/telegram/{self.token.split(':')[0]}")
+        secret = secret or os.getenv('WEBHOOK_SECRET')
+        # Handlers outlive the request, so the loop must hold a reference to
+        # each task; the semaphore bounds them, and a full house delays the
+        # 200 so Telegram (max_connections) backs off instead of piling up tasks.
+        slots = asyncio.Semaphore(int(os.getenv('WEBHOOK_MAX_IN_FLIGHT', 256)))
+        in_flight = set()
+
+        def finished(task):
+            in_flight.discard(task)
+            slots.release()
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(f"Update handler error: {task.exception()}")
+
+        async def receive_update(request):
+            if secret and request.headers.get('X-Telegram-Bot-Api-Secret-Token') != secret:
+                return web.Response(status=403)
+            update = types.Update.de_json(await request.json())
+            await slots.acquire()
+            task = asyncio.create_task(self.bot.process_new_updates([update]))
+            in_flight.add(task)
+            task.add_done_callback(finished)
+            return web.Response()
+
+        app = web.Application()
+        app.router.add_post(path, receive_update)
+        return app, path
+
+    async def run_webhook(self):
+        app, path = self.create_webhook_app()
+        webhook_url = os.getenv('WEBHOOK_URL')
+        if not webhook_url:
+            raise ValueError("WEBHOOK_URL not found")
+        await self.bot.set_webhook(url=f"{webhook_url.rstrip('/')}{path}", secret_token=os.getenv('WEBHOOK_SECRET'),
+                                   max_connections=int(os.getenv('WEBHOOK_MAX_CONNECTIONS', 100)))
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, os.getenv('WEBHOOK_HOST', '0.0.0.0'), int(os.getenv('WEBHOOK_PORT', 8443)))
+        await site.start()
+        logger.info(f"Webhook receiver listening on {path}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+    async def run_polling(self):
+        await self.bot.delete_webhook()
+        await self.bot.infinity_polling()
+
+    async def serve(self, webhook=False):
+        await self.connect_database()
+        try:
+            if webhook:
+                await self.run_webhook()
+            else:
+                await self.run_polling()
+        finally:
+            await self.bot.close_session()
+            self.executor.shutdown(wait=False)
+
+    def run(self, webhook=False):
+        logger.info(f"Starting async Bug Bounty Bot ({'webhook' if webhook else 'long-polling'})...")
+        asyncio.run(self.serve(webhook))
+
+instrument_methods(AsyncBugBountyBot, 'telegram_handler_seconds', HANDLER_METHODS)
@@ -1,13 +1,23 @@
 import os
 import logging
 import time
-from telebot import TeleBot, types
+from telebot import TeleBot
 from bot.database import DatabaseManager
-from bot.tasks import run_scan_task
+from bot.tasks import enqueue_scan
+from bot.views import (main_menu_keyboard, bounty_list_keyboard, bounty_list_text, bounty_details, system_status_text,
+                       system_stats_text, model_status_text, manual_report, REPORT_USAGE, ADD_BOUNTY_TEXT)
+from bot.catalog import CatalogCache
+from bot.bounty_sync import sync_on_startup
+from bot.router import build_router
+from bot.session import SessionCache
+from monitoring.metrics import instrument_methods
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+HANDLER_METHODS = ['show_main_menu', 'list_bounties', 'show_bounty_details', 'start_scan', 'show_system_status',
+                   'handle_callback_query', 'handle_manual_report']
+
 class BugBountyBot:
     def __init__(self):
         self.token = os.getenv("TELEGRAM_TOKEN")
@@ -15,13 +25,18 @@ class BugBountyBot:
             raise ValueError("TELEGRAM_TOKEN not found")
         self.bot = TeleBot(self.token)
         self.db = DatabaseManager()
+        self.catalog = CatalogCache(self.db)
+        self.catalog.start_change_stream()
+        self.sessions = SessionCache()
+        self.router = build_router(self)
         self.setup_handlers()
         self.auto_heal()
 
     def auto_heal(self):
         try:
-            self.db.get_all_bounties()
+            self.db.ping()
             logger.info("✅ Database connected")
+            sync_on_startup(self.db)
         except Exception as e:
             logger.error(f"❌ DB error: {e}")
             self.retry_database_connection()
@@ -30,9 +45,10 @@ class BugBountyBot:
         for attempt in range(max_retries):
             try:
                 time.sleep(2 ** attempt)
-                self.db = DatabaseManager()
-                self.db.get_all_bounties()
+                self.db.ping()
+                self.catalog.invalidate()
                 logger.info("✅ DB reconnected")
+                sync_on_startup(self.db)
                 return True
             except Exception as e:
                 logger.error(f"Retry {attempt+1} failed: {e}")
@@ -55,52 +71,52 @@ class BugBountyBot:
         def handle_callback(call):
             self.handle_callback_query(call)
 
+    def handle_callback_query(self, call):
+        try:
+            self.router.dispatch(call)
+        except Exception as e:
+            logger.error(f"Callback error ({call.data}): {e}")
+
+    def unavailable(self, call):
+        self.bot.answer_callback_query(call.id, "Not available yet")
+
+    def load_bounty(self, chat_id, bounty_id):
+        bounty = self.sessions.get_bounty(chat_id, bounty_id)
+        if bounty is None:
+            bounty = self.db.get_bounty_by_id(bounty_id)
+            if bounty:
+                self.sessions.set_bounty(chat_id, bounty_id, bounty)
+        return bounty
+
     def show_main_menu(self, chat_id):
-        keyboard = types.InlineKeyboardMarkup(row_width=2)
-        buttons = [
-            types.InlineKeyboardButton("🔎 Bug Bounty Challenges", callback_data="list_bounties"),
-            types.InlineKeyboardButton("➕ Add New Challenge", callback_data="add_bounty"),
-            types.InlineKeyboardButton("📊 Stats", callback_data="stats"),
-            types.InlineKeyboardButton("🔄 Refresh Model", callback_data="refresh_model"),
-            types.InlineKeyboardButton("⚙️ System Status", callback_data="system_status")
-        ]
-        keyboard.add(*buttons)
-        self.bot.send_message(chat_id, "Welcome! Choose from the menu:", reply_markup=keyboard)
+        self.bot.send_message(chat_id, "Welcome! Choose from the menu:", reply_markup=main_menu_keyboard())
+
+    def show_system_status_callback(self, call):
+        self.show_system_status(call.message.chat.id)
+
+    def edit_main_menu(self, call):
+        self.bot.edit_message_text("Welcome! Choose from the menu:", call.message.chat.id, call.message.message_id, reply_markup=main_menu_keyboard())
 
     def list_bounties(self, call):
         try:
-            bounties = self.db.get_all_bounties()
+            page = int(call.data.rsplit("_", 1)[1]) if call.data.startswith("bounties_page_") else 0
+            bounties, page, total_pages = self.catalog.page(page)
             if not bounties:
                 self.bot.edit_message_text("No challenges yet. Tap ➕ to add one.", call.message.chat.id, call.message.message_id)
                 return
-            keyboard = types.InlineKeyboardMarkup()
-            for bounty in bounties:
-                btn = types.InlineKeyboardButton(bounty['title'], callback_data=f"bounty_{bounty['_id']}")
-                keyboard.add(btn)
-            keyboard.add(types.InlineKeyboardButton("🏠 Home", callback_data="main_menu"))
-            self.bot.edit_message_text("Select a challenge:", call.message.chat.id, call.message.message_id, reply_markup=keyboard)
+            keyboard = bounty_list_keyboard(bounties, page, total_pages)
+            self.bot.edit_message_text(bounty_list_text(page, total_pages), call.message.chat.id, call.message.message_id, reply_markup=keyboard)
         except Exception as e:
             logger.error(f"List bounties error: {e}")
 
     def show_bounty_details(self, call):
         try:
             bounty_id = call.data.split("_", 1)[1]
-            bounty = self.db.get_bounty_by_id(bounty_id)
+            bounty = self.load_bounty(call.message.chat.id, bounty_id)
             if not bounty:
                 self.bot.answer_callback_query(call.id, "❌ Challenge not found")
                 return
-            text = (
-                f"🔰 {bounty['title']}\n\n"
-                f"🎯 Target: {bounty['target']}\n"
-                f"📋 Method: {bounty['method']}\n"
-                f"⚙️ Param: {bounty['param']}\n"
-                f"📝 Instructions: {bounty['instructions']}\n\n"
-                f"⏱ Last scan: {bounty.get('last_scan', 'Never')}\n"
-                f"✅ Vulnerabilities found: {bounty.get('vulnerabilities_found', 0)}"
-            )
-            keyboard = types.InlineKeyboardMarkup()
-            keyboard.add(types.InlineKeyboardButton("✅ Start Smart Scan", callback_data=f"scan_{bounty_id}"))
-            keyboard.add(types.InlineKeyboardButton("🔙 Back", callback_data="list_bounties"), types.InlineKeyboardButton("🏠 Home", callback_data="main_menu"))
+            text, keyboard = bounty_details(bounty, bounty_id)
             self.bot.edit_message_text(text, call.message.chat.id, call.message.message_id, reply_markup=keyboard)
         except Exception as e:
             logger.error(f"Show bounty details error: {e}")
@@ -108,29 +124,60 @@ class BugBountyBot:
     def start_scan(self, call):
         try:
             bounty_id = call.data.split("_", 1)[1]
-            bounty = self.db.get_bounty_by_id(bounty_id)
+            bounty = self.load_bounty(call.message.chat.id, bounty_id)
             if not bounty:
                 self.bot.answer_callback_query(call.id, "❌ Challenge not found")
                 return
-            run_scan_task.delay(call.message.chat.id, bounty)
+            if not enqueue_scan(call.message.chat.id, bounty['_id']):
+                self.bot.answer_callback_query(call.id, "⏳ A scan of this challenge is already running")
+                return
+            # The scan will update last_scan/vulnerabilities_found; re-read on the next view.
+            self.sessions.set_bounty(call.message.chat.id, bounty_id)
             self.bot.edit_message_text("🔄 Smart scan started...", call.message.chat.id, call.message.message_id)
         except Exception as e:
             logger.error(f"Start scan error: {e}")
 
+    def show_stats(self, call):
+        try:
+            self.bot.send_message(call.message.chat.id, system_stats_text(self.db.get_system_stats()))
+        except Exception as e:
+            logger.error(f"Stats error: {e}")
+
+    def add_bounty(self, call):
+        self.bot.answer_callback_query(call.id, ADD_BOUNTY_TEXT, show_alert=True)
+
+    def show_model_status(self, call):
+        import requests
+        try:
+            stats = requests.get(f"{os.getenv('AI_MANAGER_URL')}/stats", timeout=5).json()
+            self.bot.answer_callback_query(call.id, model_status_text(stats))
+        except Exception as e:
+            logger.error(f"Model status error: {e}")
+            self.bot.answer_callback_query(call.id, "❌ AI Manager unavailable")
+
+    def handle_manual_report(self, message):
+        try:
+            details = (message.text or "").partition(" ")[2].strip()
+            bounty_id = self.sessions.current_bounty_id(message.chat.id)
+            if not details or not bounty_id:
+                self.bot.send_message(message.chat.id, REPORT_USAGE)
+                return
+            self.db.save_vulnerability(manual_report(bounty_id, message.chat.id, details))
+            self.bot.send_message(message.chat.id, "✅ Report saved")
+        except Exception as e:
+            logger.error(f"Manual report error: {e}")
+
     def show_system_status(self, chat_id):
         try:
             services_status = self.check_services_status()
-            text = "🟢 System Status:\n\n"
-            for service, status in services_status.items():
-                text += f"{'✅' if status['status'] else '❌'} {service}: {status['message']}\n"
-            self.bot.send_message(chat_id, text)
+            self.bot.send_message(chat_id, system_status_text(services_status))
         except Exception as e:
             logger.error(f"System status error: {e}")
 
     def check_services_status(self):
         import requests
         services = {
-            'MongoDB': lambda: self.db.client.admin.command('ping'),
+            'MongoDB': lambda: self.db.ping(),
             'Redis': lambda: self.bot.get_me() is not None,
             'AI Manager': lambda: requests.get(f"{os.getenv('AI_MANAGER_URL')}/health", timeout=5).status_code == 200
         }
@@ -148,3 +195,5 @@ class BugBountyBot:
         start_time = time.time()
         logger.info("Starting Bug Bounty Bot...")
         self.bot.infinity_polling()
+
+instrument_methods(BugBountyBot, 'telegram_handler_seconds', HANDLER_METHODS)
@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import hashlib
+import logging
+from pymongo import UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'bounty_config.json')
+
+
+def load_config(path=None):
+    with open(path or os.getenv('BOUNTY_CONFIG_PATH', DEFAULT_CONFIG_PATH), encoding='utf-8') as f:
+        entries = json.load(f).get('bounties', [])
+    by_id = {}
+    for entry in entries:
+        if not entry.get('id'):
+            raise ValueError(f"Bounty entry without an id: {entry.get('title')!r}")
+        if entry['id'] in by_id:
+            raise ValueError(f"Duplicate bounty id: {entry['id']!r}")
+        by_id[entry['id']] = entry
+    return by_id
+
+
+def entry_hash(entry):
+    return hashlib.sha1(json.dumps(entry, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def plan_sync(entries, existing, prune=False):
+    # entries: config id -> entry; existing: id -> stored config_hash.
+    # Only the config-owned fields are $set, so scan stats kept on the
+    # bounty document (last_scan, vulnerabilities_found, ...) survive.
+    ops = []
+    for bounty_id, entry in entries.items():
+        digest = entry_hash(entry)
+        if existing.get(bounty_id) != digest:
+            ops.append(UpdateOne({"id": bounty_id}, {"$set": dict(entry, config_hash=digest)}, upsert=True))
+    if prune:
+        ops.extend(DeleteOne({"id": bounty_id}) for bounty_id in existing if bounty_id not in entries)
+    return ops
+
+
+def sync_bounties(db_manager, path=None, prune=None):
+    if prune is None:
+        prune = os.getenv('BOUNTY_SYNC_PRUNE', '0') == '1'
+    entries = load_config(path)
+    bounties = db_manager.db.bounties
+    existing = {doc['id']: doc.get('config_hash') for doc in bounties.find({"id": {"$exists": True}}, {"_id": 0, "id": 1, "config_hash": 1})}
+    ops = plan_sync(entries, existing, prune)
+    result = {"entries": len(entries), "changed": 0, "upserted": 0, "deleted": 0}
+    if not ops:
+        logger.info(f"✅ Bounty catalog up to date ({len(entries)} entries)")
+        return result
+    try:
+        outcome = bounties.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        # A concurrent sync may have upserted the same id first; the unique
+        # index rejects the duplicate and the other writes still apply.
+        outcome = None
+        logger.error(f"Bounty sync partial failure: {e.details.get('writeErrors', [])[:3]}")
+    if outcome is not None:
+        result.update(changed=outcome.modified_count, upserted=outcome.upserted_count, deleted=outcome.deleted_count)
+    db_manager.bump_catalog_version()
+    logger.info(f"✅ Bounty catalog synced: {result}")
+    return result
+
+
+def sync_on_startup(db_manager):
+    if os.getenv('BOUNTY_SYNC_ON_STARTUP', '1') != '1':
+        return None
+    try:
+        return sync_bounties(db_manager)
+    except Exception as e:
+        logger.error(f"Bounty sync error: {e}")
+        return None
+
+
+def main(argv=None):
+    from bot.database import DatabaseManager
+    argv = list(sys.argv[1:] if argv is None else argv)
+    prune = '--prune' in argv
+    paths = [arg for arg in argv if arg != '--prune']
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    result = sync_bounties(DatabaseManager(), paths[0] if paths else None, prune=prune)
+    print(json.dumps(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
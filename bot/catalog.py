@@ -0,0 +1,98 @@
+import os
+import time
+import threading
+import logging
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Fields the cached catalog shows (iter_bounty_titles projects _id + title).
+CATALOG_FIELDS = ("title",)
+# Per-scan writes to bounties ($inc total_scans, $set last_scan) must not
+# invalidate the catalog, so only structural events and updates touching a
+# catalog field get through.
+CATALOG_CHANGE_PIPELINE = [{"$match": {"$or": [
+    {"operationType": {"$in": ["insert", "delete", "replace", "drop", "rename", "dropDatabase", "invalidate"]}},
+    *({"operationType": "update", f"updateDescription.updatedFields.{field}": {"$exists": True}} for field in CATALOG_FIELDS),
+    *({"operationType": "update", "updateDescription.removedFields": field} for field in CATALOG_FIELDS),
+]}}]
+
+
+class CatalogCache:
+    def __init__(self, db, page_size=None, check_interval=None):
+        self.db = db
+        self.page_size = int(page_size or os.getenv('BOUNTY_PAGE_SIZE', 8))
+        if check_interval is None:
+            check_interval = os.getenv('CATALOG_CHECK_INTERVAL', 5)
+        self.check_interval = float(check_interval)
+        self.entries = None
+        self.version = None
+        self.checked_at = 0.0
+        self.use_change_stream = False
+        self._dirty = threading.Event()
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def start_change_stream(self):
+        if self._watcher and self._watcher.is_alive():
+            return
+        ready = threading.Event()
+
+        def watch():
+            while True:
+                try:
+                    with self.db.db.bounties.watch(CATALOG_CHANGE_PIPELINE) as stream:
+                        self.use_change_stream = True
+                        ready.set()
+                        for _ in stream:
+                            self.invalidate()
+                except OperationFailure as e:
+                    logger.info(f"Change streams unavailable, using catalog version counter: {e}")
+                    self.use_change_stream = False
+                    ready.set()
+                    return
+                except PyMongoError as e:
+                    logger.error(f"Catalog change stream error: {e}")
+                    self.use_change_stream = False
+                    self.invalidate()
+                    time.sleep(5)
+                except Exception as e:
+                    logger.error(f"Catalog change stream unavailable: {e}")
+                    self.use_change_stream = False
+                    ready.set()
+                    return
+
+        self._watcher = threading.Thread(target=watch, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+        ready.wait(5)
+
+    def invalidate(self):
+        self._dirty.set()
+
+    def _is_stale(self):
+        if self.entries is None or self._dirty.is_set():
+            return True
+        if self.use_change_stream:
+            return False
+        now = time.monotonic()
+        if now - self.checked_at < self.check_interval:
+            return False
+        self.checked_at = now
+        return self.db.get_catalog_version() != self.version
+
+    def get_entries(self):
+        with self._lock:
+            if self._is_stale():
+                self._dirty.clear()
+                version = self.db.get_catalog_version()
+                self.entries = list(self.db.iter_bounty_titles())
+                self.version = version
+                self.checked_at = time.monotonic()
+            return self.entries
+
+    def page(self, page):
+        entries = self.get_entries()
+        total_pages = max(1, -(-len(entries) // self.page_size))
+        page = min(max(0, page), total_pages - 1)
+        start = page * self.page_size
+        return entries[start:start + self.page_size], page, total_pages
@@ -1,26 +1,157 @@
 import os
 import time
-from pymongo import MongoClient, ASCENDING
+import threading
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from datetime import datetime, timedelta
 from bson import ObjectId
+from bot.sketch import hll_register, hll_merge, hll_estimate
+from monitoring.metrics import instrument_methods
 import logging
 
 logger = logging.getLogger(__name__)
 
+ACTIVE_USERS_WINDOW_HOURS = 24
+SCAN_LOG_RETENTION_DAYS = float(os.getenv("SCAN_LOG_RETENTION_DAYS", 30))
+# Kept on the scan_results row when raw logs move to scan_logs. The findings are
+# small and are what a retried scan's vulnerability rows are rebuilt from.
+SUMMARY_LOG_FIELDS = ("ai_params", "duration", "vulnerabilities")
+
+INDEXES = {
+    "bounties": [
+        ([("title", ASCENDING)], {}),
+        ([("title", ASCENDING), ("_id", ASCENDING)], {}),
+        ([("id", ASCENDING)], {"unique": True, "partialFilterExpression": {"id": {"$exists": True}}}),
+    ],
+    "scan_results": [
+        ([("bounty_id", ASCENDING), ("timestamp", DESCENDING)], {}),
+        ([("chat_id", ASCENDING), ("timestamp", DESCENDING)], {}),
+        ([("vulnerabilities_found", ASCENDING), ("timestamp", DESCENDING)], {}),
+        ([("timestamp", ASCENDING)], {}),
+        ([("task_id", ASCENDING)], {"unique": True, "partialFilterExpression": {"task_id": {"$exists": True}}}),
+    ],
+    "scan_logs": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+    "vulnerabilities": [
+        ([("type", ASCENDING)], {}),
+        ([("scan_id", ASCENDING), ("seq", ASCENDING)], {"unique": True, "partialFilterExpression": {"seq": {"$exists": True}}}),
+    ],
+    "stats_rollup": [
+        ([("expires_at", ASCENDING)], {"expireAfterSeconds": 0}),
+    ],
+}
+
+# Representative shapes of the queries issued by DatabaseManager, checked with
+# explain() at startup so a missing index shows up as a warning, not a slow bot.
+QUERY_PLANS = [
+    ("bounties", {}, [("title", ASCENDING)]),
+    ("bounties", {"$or": [{"title": {"$gt": ""}}, {"title": "", "_id": {"$gt": ObjectId("0" * 24)}}]},
+     [("title", ASCENDING), ("_id", ASCENDING)]),
+    ("bounties", {"id": ""}, None),
+    ("scan_results", {"chat_id": 0}, [("timestamp", DESCENDING)]),
+    ("scan_results", {"bounty_id": ""}, [("timestamp", DESCENDING)]),
+    ("scan_results", {"vulnerabilities_found": {"$gt": 0}}, None),
+    ("scan_results", {"timestamp": {"$gte": datetime(1970, 1, 1)}}, None),
+    ("vulnerabilities", {"type": ""}, None),
+]
+
+def _plan_stages(plan):
+    if not isinstance(plan, dict):
+        return
+    if 'stage' in plan:
+        yield plan['stage']
+    for key in ('inputStage', 'queryPlan'):
+        yield from _plan_stages(plan.get(key))
+    for child in plan.get('inputStages', []):
+        yield from _plan_stages(child)
+
+def split_scan_logs(result_data):
+    logs = result_data.get('logs') or {}
+    result_data['logs'] = {key: logs[key] for key in SUMMARY_LOG_FIELDS if key in logs}
+    return {
+        "_id": result_data.get('_id'),
+        "chat_id": result_data.get('chat_id'),
+        "logs": logs,
+        "expires_at": result_data['timestamp'] + timedelta(days=SCAN_LOG_RETENTION_DAYS)
+    }
+
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "bug_bounty_db")
+
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+_prepared = set()
+
+def _client_options():
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", 50)),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", 0)),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_MS", 60000)),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000)),
+        "connect": False,
+    }
+
+def get_client(mongo_uri):
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            reset_clients()
+        client = _clients.get(mongo_uri)
+        if client is None:
+            client = _clients[mongo_uri] = MongoClient(mongo_uri, **_client_options())
+        return client
+
+def reset_clients():
+    # A forked child must never touch the parent's sockets or monitor threads,
+    # so the inherited clients are dropped without closing them.
+    global _clients_pid
+    _clients.clear()
+    _prepared.clear()
+    _clients_pid = os.getpid()
+
+def close_clients():
+    with _clients_lock:
+        if _clients_pid == os.getpid():
+            for client in _clients.values():
+                client.close()
+        reset_clients()
+
+def _reset_clients_after_fork():
+    # Another thread may have held _clients_lock at fork time; the child only
+    # has this thread, so it gets a fresh lock instead of waiting forever.
+    global _clients_lock
+    _clients_lock = threading.Lock()
+    reset_clients()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
 class DatabaseManager:
-    def __init__(self):
-        self.mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-        self.client = None
-        self.db = None
-        self.connect_with_retry()
-        self._create_indexes()
+    def __init__(self, mongo_uri=None, client=None):
+        self.mongo_uri = mongo_uri or os.getenv("MONGO_URI", "mongodb://localhost:27017")
+        self._client = client
+        self._db = None
+        self._db_pid = None
+
+    @property
+    def client(self):
+        return self._client if self._client is not None else get_client(self.mongo_uri)
+
+    @property
+    def db(self):
+        if self._db is None or self._db_pid != os.getpid():
+            self._db, self._db_pid = self.client[MONGO_DB_NAME], os.getpid()
+            key = (id(self._client), self.mongo_uri)
+            if key not in _prepared and self._create_indexes():
+                _prepared.add(key)
+                self._seed_stats_rollup()
+                if os.getenv("MONGO_EXPLAIN_ON_STARTUP", "1") == "1":
+                    self.check_query_plans()
+        return self._db
 
     def connect_with_retry(self, max_retries=5, retry_delay=2):
         for attempt in range(max_retries):
             try:
-                self.client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000)
-                self.db = self.client.bug_bounty_db
-                self.client.admin.command('ping')
+                self.ping()
                 logger.info("✅ Connected to database")
                 return True
             except Exception as e:
@@ -30,47 +161,164 @@ class DatabaseManager:
 
     def _create_indexes(self):
         try:
-            self.db.bounties.create_index([("title", ASCENDING)])
-            self.db.scan_results.create_index([("bounty_id", ASCENDING)])
-            self.db.vulnerabilities.create_index([("type", ASCENDING)])
+            for collection, indexes in INDEXES.items():
+                for keys, options in indexes:
+                    self.db[collection].create_index(keys, **options)
             logger.info("✅ Indexes created")
+            return True
         except Exception as e:
             logger.error(f"Index creation error: {e}")
+            return False
+
+    def check_query_plans(self):
+        collscans = []
+        for collection, query, sort in QUERY_PLANS:
+            try:
+                cursor = self.db[collection].find(query)
+                if sort:
+                    cursor = cursor.sort(sort)
+                plan = cursor.explain().get('queryPlanner', {}).get('winningPlan')
+                if 'COLLSCAN' in set(_plan_stages(plan)):
+                    collscans.append((collection, query))
+                    logger.warning(f"⚠️ Collection scan on {collection} for {query} sort={sort}")
+            except Exception as e:
+                logger.error(f"Explain error on {collection}: {e}")
+        return collscans
+
+    def _seed_stats_rollup(self):
+        try:
+            if self.db.stats_rollup.find_one({"_id": "global", "seeded": True}, {"_id": 1}):
+                return
+            counts = {
+                "total_scans": self.db.scan_results.count_documents({}),
+                "successful_scans": self.db.scan_results.count_documents({"vulnerabilities_found": {"$gt": 0}}),
+                "total_vulnerabilities": self.db.vulnerabilities.count_documents({}),
+                "seeded": True
+            }
+            # $setOnInsert only writes when the document does not exist yet, so
+            # $inc updates from writers that landed after the counts were taken
+            # are never overwritten.
+            result = self.db.stats_rollup.update_one({"_id": "global"}, {"$setOnInsert": counts}, upsert=True)
+            if result.upserted_id is None:
+                # Live increments created the document first; keep their counters.
+                self.db.stats_rollup.update_one({"_id": "global"}, {"$set": {"seeded": True}})
+                logger.warning("⚠️ Stats rollup already populated by writers, seed skipped")
+            else:
+                logger.info("✅ Stats rollup seeded")
+        except Exception as e:
+            logger.error(f"Stats rollup seed error: {e}")
+
+    def _scan_rollup_updates(self, result_data):
+        found = result_data.get('vulnerabilities_found', 0)
+        updates = [({"_id": "global"}, {"$inc": {"total_scans": 1, "successful_scans": 1 if found > 0 else 0}})]
+        chat_id = result_data.get('chat_id')
+        if chat_id is not None:
+            bucket = result_data['timestamp'].replace(minute=0, second=0, microsecond=0)
+            index, rank = hll_register(chat_id)
+            updates.append((
+                {"_id": f"active_users:{bucket:%Y%m%d%H}"},
+                {"$max": {f"registers.{index}": rank},
+                 "$setOnInsert": {"expires_at": bucket + timedelta(hours=ACTIVE_USERS_WINDOW_HOURS + 1)}}
+            ))
+        return updates
+
+    @staticmethod
+    def _rollup_key(name):
+        return str(name).replace('.', '_').lstrip('$')
+
+    def _vulnerability_rollup_update(self, vuln_data):
+        inc = {"total_vulnerabilities": 1}
+        if vuln_data.get('type'):
+            inc[f"vulnerabilities_by_type.{self._rollup_key(vuln_data['type'])}"] = 1
+        if vuln_data.get('severity'):
+            inc[f"vulnerabilities_by_severity.{self._rollup_key(vuln_data['severity'])}"] = 1
+        return {"_id": "global"}, {"$inc": inc}
+
+    def _bounty_rollup_update(self, vulnerabilities_found):
+        return {"_id": "global"}, {"$inc": {"bounty_scans": 1, "bounty_vulnerabilities": vulnerabilities_found},
+                                   "$max": {"last_scan_at": datetime.utcnow()}}
+
+    def ping(self):
+        return self.client.admin.command('ping')
 
     def get_all_bounties(self):
         return list(self.db.bounties.find({}).sort("title", ASCENDING))
 
+    def get_bounties_page(self, after=None, limit=50, projection=None):
+        query = {}
+        if after is not None:
+            title, last_id = after
+            query = {"$or": [{"title": {"$gt": title}}, {"title": title, "_id": {"$gt": last_id}}]}
+        cursor = self.db.bounties.find(query, projection or {"_id": 1, "title": 1})
+        return list(cursor.sort([("title", ASCENDING), ("_id", ASCENDING)]).limit(limit))
+
+    def iter_bounty_titles(self, page_size=500):
+        after = None
+        while True:
+            page = self.get_bounties_page(after, page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = (page[-1]['title'], page[-1]['_id'])
+
+    def get_catalog_version(self):
+        doc = self.db.catalog_meta.find_one({"_id": "bounties"}, {"version": 1})
+        return doc['version'] if doc else 0
+
+    def bump_catalog_version(self):
+        self.db.catalog_meta.update_one({"_id": "bounties"}, {"$inc": {"version": 1}}, upsert=True)
+
     def get_bounty_by_id(self, bounty_id):
-        return self.db.bounties.find_one({"_id": ObjectId(bounty_id)})
+        # Accepts a Mongo ObjectId or the config slug (bounty_config.json "id").
+        if isinstance(bounty_id, ObjectId) or ObjectId.is_valid(bounty_id):
+            return self.db.bounties.find_one({"_id": ObjectId(bounty_id)})
+        return self.db.bounties.find_one({"id": bounty_id})
 
     def save_scan_result(self, result_data):
         result_data['timestamp'] = datetime.utcnow()
-        return self.db.scan_results.insert_one(result_data)
+        log_doc = split_scan_logs(result_data)
+        result = self.db.scan_results.insert_one(result_data)
+        log_doc['_id'] = result.inserted_id
+        self.db.scan_logs.insert_one(log_doc)
+        for query, update in self._scan_rollup_updates(result_data):
+            self.db.stats_rollup.update_one(query, update, upsert=True)
+        return result
 
     def save_vulnerability(self, vuln_data):
         vuln_data['discovered_at'] = datetime.utcnow()
-        return self.db.vulnerabilities.insert_one(vuln_data)
+        result = self.db.vulnerabilities.insert_one(vuln_data)
+        self.db.stats_rollup.update_one(*self._vulnerability_rollup_update(vuln_data), upsert=True)
+        return result
 
     def update_bounty_stats(self, bounty_id, vulnerabilities_found):
-        return self.db.bounties.update_one(
+        result = self.db.bounties.update_one(
             {"_id": ObjectId(bounty_id)},
             {"$set": {"last_scan": datetime.utcnow()}, "$inc": {"vulnerabilities_found": vulnerabilities_found, "total_scans": 1}}
         )
+        self.db.stats_rollup.update_one(*self._bounty_rollup_update(vulnerabilities_found), upsert=True)
+        return result
+
+    def get_stats_rollup(self):
+        return self.db.stats_rollup.find_one({"_id": "global"}) or {}
+
+    def _active_users_estimate(self):
+        now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        bucket_ids = [f"active_users:{now - timedelta(hours=h):%Y%m%d%H}" for h in range(ACTIVE_USERS_WINDOW_HOURS)]
+        sketches = self.db.stats_rollup.find({"_id": {"$in": bucket_ids}}, {"registers": 1})
+        return hll_estimate(hll_merge(doc.get('registers', {}) for doc in sketches))
 
     def get_system_stats(self):
         try:
-            total_bounties = self.db.bounties.count_documents({})
-            total_scans = self.db.scan_results.count_documents({})
-            total_vulnerabilities = self.db.vulnerabilities.count_documents({})
-            successful_scans = self.db.scan_results.count_documents({"vulnerabilities_found": {"$gt": 0}})
+            rollup = self.get_stats_rollup()
+            total_scans = rollup.get('total_scans', 0)
+            successful_scans = rollup.get('successful_scans', 0)
             success_rate = (successful_scans / total_scans * 100) if total_scans > 0 else 0
-            active_users = self.db.scan_results.distinct("chat_id", {"timestamp": {"$gte": datetime.utcnow() - timedelta(hours=24)}})
             return {
-                "total_bounties": total_bounties,
+                "total_bounties": self.db.bounties.estimated_document_count(),
                 "total_scans": total_scans,
-                "total_vulnerabilities": total_vulnerabilities,
+                "total_vulnerabilities": rollup.get('total_vulnerabilities', 0),
                 "success_rate": round(success_rate, 2),
-                "active_users": len(active_users)
+                "active_users": self._active_users_estimate()
             }
         except Exception as e:
             logger.error(f"System stats error: {e}")
@@ -78,7 +326,8 @@ class DatabaseManager:
 
     def get_active_users_count(self):
         try:
-            active_users = self.db.scan_results.distinct("chat_id", {"timestamp": {"$gte": datetime.utcnow() - timedelta(hours=24)}})
-            return len(active_users)
+            return self._active_users_estimate()
         except Exception as e:
             return 0
+
+instrument_methods(DatabaseManager, 'db_call_seconds')
@@ -0,0 +1,24 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+_session = None
+_session_pid = None
+_lock = threading.Lock()
+
+
+def get_session():
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _lock:
+            if _session is None or _session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=int(os.getenv('HTTP_POOL_CONNECTIONS', 10)),
+                    pool_maxsize=int(os.getenv('HTTP_POOL_MAXSIZE', 32))
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
@@ -0,0 +1,223 @@
+import os
+import time
+import heapq
+import logging
+import threading
+from collections import deque
+import redis
+from bot.http_session import get_session
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_LENGTH = 4096
+
+# Shared across every process that sends (each Celery child has its own
+# NotificationService): one token bucket for the bot-wide rate plus a per-chat
+# key with PX expiry. Returns {0, 0} when a send may go now, else
+# {per_chat, milliseconds to wait}.
+_RATE_LIMIT_SCRIPT = """
+local chat_wait = redis.call('PTTL', KEYS[2])
+if chat_wait > 0 then return {1, chat_wait} end
+local rate = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or rate
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(rate, tokens + math.max(0, now - ts) * rate / 1000)
+-- The bucket refills within a second, so an idle one may expire as full.
+if tokens < 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], 2000)
+    return {0, math.ceil((1 - tokens) * 1000 / rate)}
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], 2000)
+if tonumber(ARGV[2]) > 0 then
+    redis.call('SET', KEYS[2], 1, 'PX', ARGV[2])
+end
+return {0, 0}
+"""
+
+
+class NotificationService:
+    def __init__(self, token=None, session=None, global_rate=None, per_chat_interval=None, max_retries=5,
+                 redis_client=None):
+        self.token = token or os.getenv("TELEGRAM_TOKEN")
+        self.api_url = f"{os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')}/bot{self.token}"
+        self.session = session or get_session()
+        self.global_rate = float(global_rate or os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+        self.per_chat_interval = float(per_chat_interval or os.getenv('TELEGRAM_PER_CHAT_INTERVAL', 1.0))
+        self.max_retries = max_retries
+        self.redis = redis_client
+        self._rate_limit = redis_client.register_script(_RATE_LIMIT_SCRIPT) if redis_client is not None else None
+        self.pending = {}
+        self.next_allowed = {}
+        self.ready = []
+        self.tokens = self.global_rate
+        self.tokens_updated = time.monotonic()
+        self.in_flight = 0
+        self.sent = 0
+        self.failed = 0
+        self.rate_limited = 0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _ensure_sender(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+            self._thread.start()
+
+    def send(self, chat_id, text):
+        with self._cond:
+            self._ensure_sender()
+            queue = self.pending.get(chat_id)
+            if queue is None:
+                queue = self.pending[chat_id] = deque()
+                heapq.heappush(self.ready, (self.next_allowed.get(chat_id, 0.0), chat_id))
+            queue.append([text, 0])
+            self._cond.notify()
+
+    def _take_token(self, now, chat_id):
+        if self._rate_limit is not None:
+            try:
+                per_chat, wait_ms = self._rate_limit(keys=["notify:bucket", f"notify:chat:{chat_id}"],
+                                                     args=[self.global_rate, int(self.per_chat_interval * 1000)])
+                return int(wait_ms) / 1000, bool(per_chat)
+            except redis.RedisError as e:
+                # Degrade to this process's own bucket rather than stop sending.
+                logger.error(f"Shared rate limiter error: {e}")
+        return self._take_local_token(now), False
+
+    def _take_local_token(self, now):
+        self.tokens = min(self.global_rate, self.tokens + (now - self.tokens_updated) * self.global_rate)
+        self.tokens_updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.global_rate
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if not self.ready:
+                    self._cond.wait()
+                    continue
+                ready_at, chat_id = self.ready[0]
+                if chat_id not in self.pending:
+                    heapq.heappop(self.ready)
+                    continue
+                allowed = self.next_allowed.get(chat_id, 0.0)
+                if ready_at < allowed:
+                    heapq.heapreplace(self.ready, (allowed, chat_id))
+                    continue
+                wait = ready_at - now
+                if wait <= 0:
+                    wait, per_chat = self._take_token(now, chat_id)
+                    if per_chat:
+                        # Another process sent to this chat recently; let other chats go first.
+                        self.next_allowed[chat_id] = now + wait
+                        heapq.heapreplace(self.ready, (now + wait, chat_id))
+                        continue
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self.ready)
+                queue = self.pending.pop(chat_id)
+                batch = []
+                length = 0
+                while queue and length + len(queue[0][0]) + 2 <= MAX_MESSAGE_LENGTH:
+                    item = queue.popleft()
+                    batch.append(item)
+                    length += len(item[0]) + 2
+                if not batch:
+                    batch.append(queue.popleft())
+                if queue:
+                    self.pending[chat_id] = queue
+                self.in_flight += 1
+                return chat_id, batch
+
+    def _requeue(self, chat_id, batch, not_before):
+        with self._cond:
+            queue = self.pending.get(chat_id)
+            if queue is None:
+                queue = self.pending[chat_id] = deque()
+            queue.extendleft(reversed(batch))
+            self.next_allowed[chat_id] = max(self.next_allowed.get(chat_id, 0.0), not_before)
+            heapq.heappush(self.ready, (self.next_allowed[chat_id], chat_id))
+
+    def _deliver(self, chat_id, batch):
+        text = "\n\n".join(item[0] for item in batch)[:MAX_MESSAGE_LENGTH]
+        try:
+            response = self.session.post(f"{self.api_url}/sendMessage", json={"chat_id": chat_id, "text": text}, timeout=10)
+            if response.status_code == 429:
+                try:
+                    retry_after = float(response.json().get('parameters', {}).get('retry_after'))
+                except Exception:
+                    retry_after = float(response.headers.get('Retry-After', 1))
+                self.rate_limited += 1
+                logger.warning(f"⚠️ Telegram rate limit, retrying chat {chat_id} in {retry_after}s")
+                self._requeue(chat_id, batch, time.monotonic() + retry_after)
+                return
+            response.raise_for_status()
+            self.sent += len(batch)
+        except Exception as e:
+            retry = [item for item in batch if item[1] < self.max_retries]
+            for item in retry:
+                item[1] += 1
+            self.failed += len(batch) - len(retry)
+            logger.error(f"Notify error for chat {chat_id}: {e}")
+            if retry:
+                self._requeue(chat_id, retry, time.monotonic() + 2 ** retry[0][1])
+            return
+        with self._cond:
+            self.next_allowed[chat_id] = time.monotonic() + self.per_chat_interval
+            if chat_id in self.pending:
+                heapq.heappush(self.ready, (self.next_allowed[chat_id], chat_id))
+            elif len(self.next_allowed) > 10000:
+                now = time.monotonic()
+                self.next_allowed = {c: t for c, t in self.next_allowed.items() if t > now}
+
+    def _run(self):
+        while True:
+            chat_id, batch = self._next_batch()
+            try:
+                self._deliver(chat_id, batch)
+            finally:
+                with self._cond:
+                    self.in_flight -= 1
+                    self._cond.notify_all()
+
+    def flush(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.pending or self.in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self):
+        with self._cond:
+            return {"queued": sum(len(queue) for queue in self.pending.values()), "sent": self.sent,
+                    "failed": self.failed, "rate_limited": self.rate_limited}
+
+
+_notifier = None
+_notifier_pid = None
+
+
+def get_notifier():
+    global _notifier, _notifier_pid
+    if _notifier is None or _notifier_pid != os.getpid():
+        redis_client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        _notifier, _notifier_pid = NotificationService(redis_client=redis_client), os.getpid()
+    return _notifier
+
+
+def flush_notifier(timeout=30):
+    if _notifier is not None and _notifier_pid == os.getpid():
+        return _notifier.flush(timeout)
+    return True
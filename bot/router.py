@@ -0,0 +1,67 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackRouter:
+    # Exact callback_data values resolve with one dict lookup. Prefixed values
+    # ("bounty_<id>", "bounties_page_<n>") are bucketed by the text before the
+    # first "_", so a lookup is one split plus one dict hit, whatever the
+    # number of routes.
+    def __init__(self, default=None):
+        self.exact = {}
+        self.prefixes = {}
+        self.default = default
+
+    def on(self, data, handler):
+        self.exact[data] = handler
+        return self
+
+    def on_prefix(self, prefix, handler):
+        bucket = self.prefixes.setdefault(prefix.split("_", 1)[0], [])
+        bucket.append((prefix, handler))
+        bucket.sort(key=lambda route: len(route[0]), reverse=True)
+        return self
+
+    def resolve(self, data):
+        data = data or ""
+        handler = self.exact.get(data)
+        if handler is not None:
+            return handler
+        for prefix, handler in self.prefixes.get(data.split("_", 1)[0], ()):
+            if data.startswith(prefix):
+                return handler
+        return self.default
+
+    def dispatch(self, call):
+        handler = self.resolve(call.data)
+        if handler is None:
+            logger.warning(f"⚠️ Unrouted callback: {call.data!r}")
+            return None
+        return handler(call)
+
+
+# Button callback_data -> handler method name. Both front-ends (BugBountyBot
+# and AsyncBugBountyBot) implement these methods, so they share one table.
+EXACT_ROUTES = {
+    "list_bounties": "list_bounties",
+    "main_menu": "edit_main_menu",
+    "system_status": "show_system_status_callback",
+    "stats": "show_stats",
+    "add_bounty": "add_bounty",
+    "refresh_model": "show_model_status",
+}
+PREFIX_ROUTES = [
+    ("bounties_page_", "list_bounties"),
+    ("bounty_", "show_bounty_details"),
+    ("scan_", "start_scan"),
+]
+
+
+def build_router(owner):
+    router = CallbackRouter(default=owner.unavailable)
+    for data, method in EXACT_ROUTES.items():
+        router.on(data, getattr(owner, method))
+    for prefix, method in PREFIX_ROUTES:
+        router.on_prefix(prefix, getattr(owner, method))
+    return router
@@ -0,0 +1,72 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+
+class SessionCache:
+    # Per-chat scratch state carried between screens (e.g. the bounty being
+    # viewed), bounded LRU over chats with a TTL per entry.
+    def __init__(self, max_chats=None, ttl=None):
+        self.max_chats = int(max_chats or os.getenv('BOT_SESSION_MAX_CHATS', 10000))
+        self.ttl = float(ttl or os.getenv('BOT_SESSION_TTL', 300))
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, chat_id, key):
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(chat_id)
+            entry = session.get(key) if session else None
+            if entry is None or entry[1] < now:
+                if entry is not None:
+                    del session[key]
+                self.misses += 1
+                return None
+            self._sessions.move_to_end(chat_id)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, chat_id, key, value):
+        with self._lock:
+            session = self._sessions.get(chat_id)
+            if session is None:
+                session = self._sessions[chat_id] = {}
+            else:
+                self._sessions.move_to_end(chat_id)
+            session[key] = (value, time.monotonic() + self.ttl)
+            while len(self._sessions) > self.max_chats:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, chat_id, key):
+        with self._lock:
+            session = self._sessions.get(chat_id)
+            if session:
+                session.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def get_bounty(self, chat_id, bounty_id):
+        cached = self.get(chat_id, 'bounty')
+        if cached is not None and cached[0] == bounty_id:
+            return cached[1]
+        return None
+
+    def set_bounty(self, chat_id, bounty_id, bounty=None):
+        # bounty=None keeps the chat's context on bounty_id but forces the next
+        # screen to re-read it (used once a scan will change its stats).
+        self.set(chat_id, 'bounty', (bounty_id, bounty))
+
+    def current_bounty_id(self, chat_id):
+        cached = self.get(chat_id, 'bounty')
+        return cached[0] if cached is not None else None
+
+    def stats(self):
+        with self._lock:
+            return {"chats": len(self._sessions), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,32 @@
+import math
+import hashlib
+
+HLL_PRECISION = 10
+
+
+def hll_register(value, precision=HLL_PRECISION):
+    h = int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+    width = 64 - precision
+    index = h >> width
+    remainder = h & ((1 << width) - 1)
+    return index, width - remainder.bit_length() + 1
+
+
+def hll_merge(sketches):
+    merged = {}
+    for registers in sketches:
+        for index, rank in registers.items():
+            if rank > merged.get(index, 0):
+                merged[index] = rank
+    return merged
+
+
+def hll_estimate(registers, precision=HLL_PRECISION):
+    m = 1 << precision
+    alpha = 0.7213 / (1 + 1.079 / m)
+    zeros = m - len(registers)
+    harmonic = zeros + sum(2.0 ** -rank for rank in registers.values())
+    estimate = alpha * m * m / harmonic
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * math.log(m / zeros)
+    return int(round(estimate))
@@ -1,17 +1,44 @@
 import os
 import time
-import requests
+import uuid
+import random
+import redis
 from celery import Celery
+from celery.exceptions import SoftTimeLimitExceeded
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
+from kombu import Queue
 from datetime import datetime
 from bot.database import DatabaseManager
+from bot.ai_client import get_ai_client
+from bot.notifier import get_notifier, flush_notifier
+from bot.write_buffer import get_writer, close_writer
+from monitoring.metrics import timer, count, start_flusher, write_snapshot
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+SCAN_QUEUE_SHARDS = int(os.getenv("SCAN_QUEUE_SHARDS", 8))
+SCAN_PRIORITY_LEVELS = 10
+SCAN_LOCK_TTL = int(os.getenv("SCAN_LOCK_TTL", 1800))
+SCAN_TIME_LIMIT_FACTOR = float(os.getenv("SCAN_TIME_LIMIT_FACTOR", 10))
+SCAN_MIN_TIME_LIMIT = float(os.getenv("SCAN_MIN_TIME_LIMIT", 60))
+SCAN_HARD_LIMIT_GRACE = float(os.getenv("SCAN_HARD_LIMIT_GRACE", 30))
+
 app = Celery('bug_bounty_tasks', broker=redis_url)
 app.conf.update(
+    task_queues=[Queue(f"scans.{i}") for i in range(SCAN_QUEUE_SHARDS)],
+    task_default_queue="scans.0",
+    # Lower number wins; each priority step is a separate Redis list. Shards
+    # keep kombu's default round_robin order so no shard is always polled first.
+    broker_transport_options={
+        "priority_steps": list(range(SCAN_PRIORITY_LEVELS)),
+        "visibility_timeout": SCAN_LOCK_TTL + 3600,
+    },
+    worker_prefetch_multiplier=1,
+    task_ignore_result=True,
+    result_expires=3600,
     task_serializer='json',
     accept_content=['json'],
     result_serializer='json',
@@ -24,62 +51,156 @@ app.conf.update(
 
 db = DatabaseManager()
 
+_redis = None
+_redis_pid = None
+
+def get_redis():
+    global _redis, _redis_pid
+    if _redis is None or _redis_pid != os.getpid():
+        _redis, _redis_pid = redis.Redis.from_url(redis_url), os.getpid()
+    return _redis
+
+def queue_for_chat(chat_id):
+    return f"scans.{int(chat_id) % SCAN_QUEUE_SHARDS}"
+
+def _lock_key(bounty_id):
+    return f"scan:lock:{bounty_id}"
+
+def _inflight_key(chat_id):
+    return f"scan:inflight:{chat_id}"
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    redis.call('del', KEYS[1])
+    local n = redis.call('decr', KEYS[2])
+    if n <= 0 then redis.call('del', KEYS[2]) end
+    return 1
+end
+return 0
+"""
+
+def enqueue_scan(chat_id, bounty_id):
+    # One scan per bounty at a time; the lock holds the id of the scan that owns it.
+    client = get_redis()
+    task_id = str(uuid.uuid4())
+    if not client.set(_lock_key(bounty_id), task_id, nx=True, ex=SCAN_LOCK_TTL):
+        return None
+    pipe = client.pipeline()
+    pipe.incr(_inflight_key(chat_id))
+    pipe.expire(_inflight_key(chat_id), SCAN_LOCK_TTL)
+    inflight = pipe.execute()[0]
+    # A chat's first scan jumps ahead of its own backlog and of bursty chats.
+    priority = min(inflight - 1, SCAN_PRIORITY_LEVELS - 1)
+    try:
+        run_scan_task.apply_async(args=(chat_id, str(bounty_id)), task_id=task_id,
+                                  queue=queue_for_chat(chat_id), priority=priority)
+    except Exception:
+        release_scan_lock(chat_id, bounty_id, task_id)
+        raise
+    return task_id
+
+def release_scan_lock(chat_id, bounty_id, scan_id):
+    try:
+        get_redis().eval(_RELEASE_SCRIPT, 2, _lock_key(bounty_id), _inflight_key(chat_id), scan_id)
+    except Exception as e:
+        logger.error(f"Scan lock release error: {e}")
+
+def scan_time_limits(params):
+    soft = max(SCAN_MIN_TIME_LIMIT, float(params.get("timeout", 30)) * SCAN_TIME_LIMIT_FACTOR)
+    return soft, soft + SCAN_HARD_LIMIT_GRACE
+
+def check_time_limit(task, started):
+    # Celery only enforces time limits under prefork; on the threads pool the
+    # scan checks its soft limit itself before recording any results.
+    soft_limit = (task.request.timelimit or (None, None))[1]
+    if soft_limit and time.monotonic() - started > soft_limit:
+        raise SoftTimeLimitExceeded()
+
 class ScanReport:
     def __init__(self, chat_id, cfg):
         self.chat_id = chat_id
         self.cfg = cfg
-        self.client = AiClient(os.getenv("AI_MANAGER_URL"))
+        self.client = get_ai_client()
+        self.write_ticket = None
 
     def suggest(self, state):
         return self.client.suggest_params(state)
 
-    def compile_report(self, logs):
+    def compile_report(self, logs, state=None, task_id=None):
         report = {
+            "task_id": task_id,
             "chat_id": self.chat_id,
             "bounty_id": str(self.cfg.get("_id", "")),
+            "state": state,
             "timestamp": datetime.utcnow(),
             "logs": logs,
             "vulnerabilities_found": len(logs.get("vulnerabilities", [])),
             "scan_duration": logs.get("duration", 0)
         }
-        try:
-            result = db.save_scan_result(report)
-            report["_id"] = str(result.inserted_id)
-            return report
-        except Exception as e:
-            logger.error(f"Save scan result error: {e}")
-            return report
+        if task_id is None:
+            report.pop("task_id")
+        self.write_ticket = get_writer(db).add_scan(report, logs.get("vulnerabilities", []), self.cfg.get("_id"))
+        return report
 
     def notify_user(self, report):
-        import telebot
-        bot = telebot.TeleBot(os.getenv("TELEGRAM_TOKEN"))
         if report['vulnerabilities_found'] > 0:
             message = f"✅ Found {report['vulnerabilities_found']} vulnerabilities in {self.cfg['title']}!"
         else:
             message = f"🔍 Scan of {self.cfg['title']} completed. No vulnerabilities found."
-        bot.send_message(self.chat_id, message)
+        get_notifier().send(self.chat_id, message)
 
-class AiClient:
-    def __init__(self, base_url):
-        self.base_url = base_url.rstrip('/')
+# worker_process_* fire in prefork children, worker_* in the main process (the
+# only one under the threads pool); both helpers are no-ops in a process that
+# never wrote anything.
+@worker_init.connect
+@worker_process_init.connect
+def start_metrics_flusher(**kwargs):
+    start_flusher()
 
-    def suggest_params(self, state):
-        try:
-            response = requests.post(f"{self.base_url}/suggest", json=state, timeout=10)
-            return response.json() if response.status_code == 200 else self.get_fallback_params()
-        except Exception:
-            return self.get_fallback_params()
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def flush_notifications(**kwargs):
+    close_writer(timeout=10)
+    flush_notifier(timeout=10)
+    write_snapshot()
 
-    def get_fallback_params(self):
-        return {"rate": 1000, "intensity": 0.5, "accuracy": 0.5, "timeout": 30, "threads": 20}
+@app.task(bind=True, max_retries=3, default_retry_delay=60, soft_time_limit=30, time_limit=60)
+def run_scan_task(self, chat_id, bounty_id):
+    # Payloads queued before IDs were passed still carry the whole document.
+    if isinstance(bounty_id, dict):
+        bounty_id = str(bounty_id['_id'])
+    scan_id = self.request.id
+    try:
+        with timer('scan_phase_seconds', phase='load_bounty'):
+            bounty = db.get_bounty_by_id(bounty_id)
+        if not bounty:
+            logger.error(f"Scan task: bounty {bounty_id} not found")
+            release_scan_lock(chat_id, bounty_id, scan_id)
+            return {"status": "missing"}
+        scanner = ScanReport(chat_id, bounty)
+        state = {"target": bounty['target'], "method": bounty['method'], "param": bounty['param']}
+        with timer('scan_phase_seconds', phase='suggest'):
+            params = scanner.suggest(state)
+        soft_limit, hard_limit = scan_time_limits(params)
+        execute_scan.apply_async(
+            args=(chat_id, bounty_id, state, params, scan_id),
+            queue=self.request.delivery_info.get('routing_key') or queue_for_chat(chat_id),
+            priority=self.request.delivery_info.get('priority'),
+            soft_time_limit=soft_limit, time_limit=hard_limit
+        )
+        return {"status": "dispatched"}
+    except Exception as e:
+        logger.error(f"Scan task failed: {e}")
+        if self.request.retries >= self.max_retries:
+            release_scan_lock(chat_id, bounty_id, scan_id)
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
 
 @app.task(bind=True, max_retries=3, default_retry_delay=60)
-def run_scan_task(self, chat_id, bounty):
+def execute_scan(self, chat_id, bounty_id, state, params, scan_id):
+    started = time.monotonic()
     try:
-        import random
+        bounty = db.get_bounty_by_id(bounty_id)
         scanner = ScanReport(chat_id, bounty)
-        state = {"target": bounty['target'], "method": bounty['method'], "param": bounty['param']}
-        params = scanner.suggest(state)
         scan_duration = random.uniform(30, 120)
         vulnerabilities = []
         if random.random() < 0.3:
@@ -92,10 +213,25 @@ def run_scan_task(self, chat_id, bounty):
                     "confidence": round(random.uniform(0.7, 0.95), 2)
                 })
         logs = {"vulnerabilities": vulnerabilities, "duration": round(scan_duration, 2), "ai_params": params}
-        report = scanner.compile_report(logs)
-        db.update_bounty_stats(bounty['_id'], len(vulnerabilities))
-        scanner.notify_user(report)
+        check_time_limit(self, started)
+        with timer('scan_phase_seconds', phase='compile_report'):
+            report = scanner.compile_report(logs, state, task_id=scan_id)
+        with timer('scan_phase_seconds', phase='db_update'):
+            get_writer(db).commit(scanner.write_ticket)
+        report["_id"] = str(report["_id"])
+        with timer('scan_phase_seconds', phase='notify'):
+            scanner.notify_user(report)
+        release_scan_lock(chat_id, bounty_id, scan_id)
+        count('scans_total', status='success')
         return {"status": "success", "vulnerabilities_found": len(vulnerabilities)}
+    except SoftTimeLimitExceeded:
+        logger.error(f"Scan {scan_id} exceeded its time limit")
+        count('scans_total', status='timeout')
+        get_notifier().send(chat_id, "⏱️ Scan timed out before completing.")
+        release_scan_lock(chat_id, bounty_id, scan_id)
+        return {"status": "timeout"}
     except Exception as e:
         logger.error(f"Scan task failed: {e}")
-        self.retry(exc=e, countdown=60 * (self.request.retries + 1))
+        if self.request.retries >= self.max_retries:
+            release_scan_lock(chat_id, bounty_id, scan_id)
+        raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
@@ -0,0 +1,81 @@
+from telebot import types
+
+
+def main_menu_keyboard():
+    keyboard = types.InlineKeyboardMarkup(row_width=2)
+    buttons = [
+        types.InlineKeyboardButton("🔎 Bug Bounty Challenges", callback_data="list_bounties"),
+        types.InlineKeyboardButton("➕ Add New Challenge", callback_data="add_bounty"),
+        types.InlineKeyboardButton("📊 Stats", callback_data="stats"),
+        types.InlineKeyboardButton("🔄 Refresh Model", callback_data="refresh_model"),
+        types.InlineKeyboardButton("⚙️ System Status", callback_data="system_status")
+    ]
+    keyboard.add(*buttons)
+    return keyboard
+
+
+def bounty_list_keyboard(bounties, page=0, total_pages=1):
+    keyboard = types.InlineKeyboardMarkup()
+    for bounty in bounties:
+        keyboard.add(types.InlineKeyboardButton(bounty['title'], callback_data=f"bounty_{bounty['_id']}"))
+    navigation = []
+    if page > 0:
+        navigation.append(types.InlineKeyboardButton("◀️ Prev", callback_data=f"bounties_page_{page - 1}"))
+    if page < total_pages - 1:
+        navigation.append(types.InlineKeyboardButton("Next ▶️", callback_data=f"bounties_page_{page + 1}"))
+    if navigation:
+        keyboard.add(*navigation)
+    keyboard.add(types.InlineKeyboardButton("🏠 Home", callback_data="main_menu"))
+    return keyboard
+
+
+def bounty_list_text(page, total_pages):
+    if total_pages > 1:
+        return f"Select a challenge ({page + 1}/{total_pages}):"
+    return "Select a challenge:"
+
+
+def bounty_details(bounty, bounty_id):
+    text = (
+        f"🔰 {bounty['title']}\n\n"
+        f"🎯 Target: {bounty['target']}\n"
+        f"📋 Method: {bounty['method']}\n"
+        f"⚙️ Param: {bounty['param']}\n"
+        f"📝 Instructions: {bounty['instructions']}\n\n"
+        f"⏱ Last scan: {bounty.get('last_scan', 'Never')}\n"
+        f"✅ Vulnerabilities found: {bounty.get('vulnerabilities_found', 0)}"
+    )
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.add(types.InlineKeyboardButton("✅ Start Smart Scan", callback_data=f"scan_{bounty_id}"))
+    keyboard.add(types.InlineKeyboardButton("🔙 Back", callback_data="list_bounties"), types.InlineKeyboardButton("🏠 Home", callback_data="main_menu"))
+    return text, keyboard
+
+
+def system_status_text(services_status):
+    text = "🟢 System Status:\n\n"
+    for service, status in services_status.items():
+        text += f"{'✅' if status['status'] else '❌'} {service}: {status['message']}\n"
+    return text
+
+
+def system_stats_text(stats):
+    return (
+        "📊 Stats:\n\n"
+        f"🎯 Challenges: {stats['total_bounties']}\n"
+        f"🔍 Scans: {stats['total_scans']}\n"
+        f"🐞 Vulnerabilities: {stats['total_vulnerabilities']}\n"
+        f"✅ Success rate: {stats['success_rate']}%\n"
+        f"👥 Active users: {stats['active_users']}"
+    )
+
+
+REPORT_USAGE = "Usage: open a challenge, then send /report <what you found>"
+ADD_BOUNTY_TEXT = "Challenges are managed in config/bounty_config.json"
+
+
+def model_status_text(stats):
+    return f"🔄 Serving model {stats.get('model_version', 'unknown')}"
+
+
+def manual_report(bounty_id, chat_id, details):
+    return {"bounty_id": bounty_id, "chat_id": chat_id, "type": "manual_report", "description": details, "source": "manual"}
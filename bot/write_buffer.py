@@ -0,0 +1,269 @@
+import os
+import time
+import threading
+import logging
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from bot.database import split_scan_logs
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+EFFECT_STAGES = frozenset(('bounty', 'rollup'))
+
+
+class WriteBufferError(Exception):
+    pass
+
+
+def _merge_updates(updates):
+    merged = {}
+    for query, update in updates:
+        target = merged.setdefault(query['_id'], {})
+        for op, fields in update.items():
+            current = target.setdefault(op, {})
+            for field, value in fields.items():
+                if op == '$inc':
+                    current[field] = current.get(field, 0) + value
+                elif op == '$max':
+                    current[field] = max(current[field], value) if field in current else value
+                elif op == '$setOnInsert':
+                    current.setdefault(field, value)
+                else:
+                    current[field] = value
+    return [UpdateOne({"_id": _id}, update, upsert=True) for _id, update in merged.items()]
+
+
+def _inserted_indexes(collection, docs):
+    if not docs:
+        return set()
+    try:
+        collection.insert_many(docs, ordered=False)
+        return set(range(len(docs)))
+    except BulkWriteError as e:
+        errors = e.details.get('writeErrors', [])
+        if any(error.get('code') != DUPLICATE_KEY for error in errors):
+            raise
+        return set(range(len(docs))) - {error['index'] for error in errors}
+
+
+class BufferedWriter:
+    def __init__(self, db_manager, max_items=None, max_interval=None):
+        self.db_manager = db_manager
+        self.max_items = int(max_items or os.getenv('WRITE_BUFFER_MAX_ITEMS', 100))
+        self.max_interval = float(max_interval or os.getenv('WRITE_BUFFER_MAX_INTERVAL', 0.2))
+        self.units = []
+        self.open_owners = 0
+        self.flush_now = False
+        self.opened_at = None
+        self.batch = 0
+        self.flushed_batch = 0
+        self.failed_batches = {}
+        self.flushes = 0
+        self.round_trips = 0
+        self.reapplied = 0
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def _ensure_flusher(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="mongo-write-buffer", daemon=True)
+            self._thread.start()
+
+    def add_scan(self, report, vulnerabilities=(), bounty_id=None):
+        report.setdefault('_id', ObjectId())
+        report.setdefault('timestamp', datetime.utcnow())
+        log_doc = split_scan_logs(report)
+        with self._cond:
+            if self._closed:
+                raise WriteBufferError("Write buffer is closed")
+            self._ensure_flusher()
+            if not self.units:
+                self.opened_at = time.monotonic()
+            self.units.append((report, log_doc, list(vulnerabilities), bounty_id))
+            self.open_owners += 1
+            # Wake the flusher when a batch opens (to arm its timer) and when it fills up.
+            if len(self.units) == 1 or len(self.units) >= self.max_items:
+                self._cond.notify_all()
+            return self.batch + 1
+
+    def commit(self, ticket=None, timeout=30):
+        # ticket is the batch number returned by add_scan. Without one, wait for
+        # whatever is buffered right now (used by shutdown paths, not scans).
+        with self._cond:
+            if ticket is None:
+                ticket = self.batch + 1 if self.units else self.batch
+            elif ticket == self.batch + 1 and self.units:
+                # Once every producer in the open batch is waiting here nobody
+                # else is about to join it, so flush now instead of sitting out
+                # max_interval. Under prefork that is every batch of one.
+                self.open_owners -= 1
+                if self.open_owners <= 0:
+                    self.flush_now = True
+                    self._cond.notify_all()
+            deadline = time.monotonic() + timeout
+            while self.flushed_batch < ticket:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise WriteBufferError("Timed out waiting for buffered writes")
+                self._cond.wait(remaining)
+            error = self.failed_batches.get(ticket)
+        if error is not None:
+            raise WriteBufferError(f"Buffered write failed: {error}")
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self.units or (
+                        len(self.units) < self.max_items and not self._closed and not self.flush_now
+                        and time.monotonic() - self.opened_at < self.max_interval):
+                    if self._closed and not self.units:
+                        return
+                    timeout = None if not self.units else self.max_interval - (time.monotonic() - self.opened_at)
+                    self._cond.wait(timeout)
+                units, self.units = self.units, []
+                self.open_owners, self.flush_now = 0, False
+                self.batch += 1
+                batch = self.batch
+            error = None
+            try:
+                self._write(units)
+            except Exception as e:
+                logger.error(f"Buffered write error ({len(units)} scans): {e}")
+                error = str(e)
+            with self._cond:
+                if error is not None:
+                    self.failed_batches[batch] = error
+                    for old in [b for b in self.failed_batches if b < batch - 100]:
+                        del self.failed_batches[old]
+                self.flushed_batch = batch
+                self._cond.notify_all()
+
+    def _resolve_duplicates(self, db, units, inserted):
+        # A unit whose scan_results row already exists is a Celery retry of a
+        # scan whose earlier flush failed part-way. Rebind it to the stored row
+        # and carry the side-effect stages that row says were already applied.
+        resolved = [unit + (frozenset(),) for i, unit in enumerate(units) if i in inserted]
+        duplicates = [unit for i, unit in enumerate(units) if i not in inserted]
+        if not duplicates:
+            return resolved
+        task_ids = [unit[0]['task_id'] for unit in duplicates if unit[0].get('task_id') is not None]
+        ids = [unit[0]['_id'] for unit in duplicates if unit[0].get('task_id') is None]
+        stored = {}
+        for doc in db.scan_results.find({"$or": [{"task_id": {"$in": task_ids}}, {"_id": {"$in": ids}}]},
+                                        {"task_id": 1, "chat_id": 1, "timestamp": 1, "logs": 1, "vulnerabilities_found": 1,
+                                         "effects": 1}):
+            stored[doc.get('task_id', doc['_id'])] = doc
+        self.round_trips += 1
+        for report, log_doc, vulns, bounty_id in duplicates:
+            doc = stored.get(report.get('task_id', report['_id']))
+            if doc is None:
+                continue
+            done = frozenset(stage for stage, applied in (doc.get('effects') or {}).items() if applied)
+            if done >= EFFECT_STAGES:
+                continue
+            # The retry re-ran the scan; the stored row is what was recorded, so
+            # it wins and everything still to write is rebuilt from it.
+            logs = doc.get('logs') or {}
+            vulns = list(logs.get('vulnerabilities') or ())
+            if 'vulnerabilities' not in logs:
+                # Rows stored before findings were kept on the scan: the rows
+                # already written for it are the record.
+                vulns = [{key: value for key, value in row.items() if key not in ('_id', 'scan_id', 'seq', 'discovered_at')}
+                         for row in db.vulnerabilities.find({"scan_id": doc['_id']}).sort("seq", 1)]
+                self.round_trips += 1
+            report = dict(report, _id=doc['_id'], timestamp=doc['timestamp'], logs=logs,
+                          vulnerabilities_found=doc.get('vulnerabilities_found', len(vulns)))
+            log_doc = dict(log_doc, _id=doc['_id'], chat_id=doc.get('chat_id'), logs=logs)
+            resolved.append((report, log_doc, vulns, bounty_id, done))
+            self.reapplied += 1
+        return resolved
+
+    def _write(self, units):
+        db = self.db_manager.db
+        manager = self.db_manager
+        inserted = _inserted_indexes(db.scan_results, [unit[0] for unit in units])
+        self.round_trips += 1
+        units = self._resolve_duplicates(db, units, inserted)
+        vulnerabilities = []
+        rollups = []
+        bounty_updates = {}
+        now = datetime.utcnow()
+        if units:
+            # scan_logs (by _id) and vulnerabilities (by scan_id+seq) are keyed,
+            # so writing them again for a retried unit is a no-op.
+            _inserted_indexes(db.scan_logs, [unit[1] for unit in units])
+            self.round_trips += 1
+        for report, log_doc, vulns, bounty_id, done in units:
+            if 'rollup' not in done:
+                rollups.extend(manager._scan_rollup_updates(report))
+            for seq, vuln in enumerate(vulns):
+                doc = dict(vuln, scan_id=report['_id'], seq=seq, discovered_at=now)
+                vulnerabilities.append(doc)
+                if 'rollup' not in done:
+                    rollups.append(manager._vulnerability_rollup_update(doc))
+            if bounty_id and 'bounty' not in done:
+                found = report.get('vulnerabilities_found', len(vulns))
+                inc = bounty_updates.setdefault(str(bounty_id), {"vulnerabilities_found": 0, "total_scans": 0})
+                inc['vulnerabilities_found'] += found
+                inc['total_scans'] += 1
+                if 'rollup' not in done:
+                    rollups.append(manager._bounty_rollup_update(found))
+        if vulnerabilities:
+            _inserted_indexes(db.vulnerabilities, vulnerabilities)
+            self.round_trips += 1
+        # The counters are not keyed, so each stage is recorded on the scan rows
+        # ("effects.<stage>") and a retry only re-applies stages still missing.
+        applied = []
+        try:
+            if bounty_updates:
+                db.bounties.bulk_write([
+                    UpdateOne({"_id": ObjectId(bounty_id)}, {"$set": {"last_scan": now}, "$inc": inc})
+                    for bounty_id, inc in bounty_updates.items()
+                ], ordered=False)
+                self.round_trips += 1
+            applied.append('bounty')
+            if rollups:
+                db.stats_rollup.bulk_write(_merge_updates(rollups), ordered=False)
+                self.round_trips += 1
+            applied.append('rollup')
+        finally:
+            if applied and units:
+                try:
+                    db.scan_results.update_many({"_id": {"$in": [unit[0]['_id'] for unit in units]}},
+                                                {"$set": {f"effects.{stage}": True for stage in applied}})
+                    self.round_trips += 1
+                except Exception as e:
+                    logger.error(f"Write buffer effect marker error: {e}")
+        self.flushes += 1
+
+    def close(self, timeout=30):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {"pending": len(self.units), "flushes": self.flushes, "round_trips": self.round_trips,
+                    "reapplied": self.reapplied}
+
+
+_writer = None
+_writer_pid = None
+
+
+def get_writer(db_manager):
+    global _writer, _writer_pid
+    if _writer is None or _writer_pid != os.getpid():
+        _writer, _writer_pid = BufferedWriter(db_manager), os.getpid()
+    return _writer
+
+
+def close_writer(timeout=30):
+    if _writer is not None and _writer_pid == os.getpid():
+        _writer.close(timeout)
@@ -0,0 +1,229 @@
+import os
+import sys
+import time
+import signal
+import logging
+import subprocess
+import requests
+from monitoring.metrics import timer, count, start_flusher
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger("launcher")
+
+AI_PORT = int(os.getenv('AI_MANAGER_PORT', 5000))
+DASHBOARD_PORT = int(os.getenv('DASHBOARD_PORT', 8050))
+CHECK_INTERVAL = float(os.getenv('SUPERVISOR_CHECK_INTERVAL', 10))
+LIVENESS_FAILURES = int(os.getenv('SUPERVISOR_LIVENESS_FAILURES', 3))
+READINESS_TIMEOUT = float(os.getenv('SUPERVISOR_READINESS_TIMEOUT', 120))
+SHUTDOWN_TIMEOUT = float(os.getenv('SUPERVISOR_SHUTDOWN_TIMEOUT', 60))
+MAX_RESTART_DELAY = 60
+
+
+def gunicorn_command(app_path, port, workers, threads, timeout=60):
+    return [sys.executable, "-m", "gunicorn", app_path,
+            "--bind", f"0.0.0.0:{port}",
+            "--workers", str(workers),
+            "--threads", str(threads),
+            "--worker-class", "gthread",
+            "--timeout", str(timeout),
+            "--graceful-timeout", str(int(SHUTDOWN_TIMEOUT)),
+            "--access-logfile", "-"]
+
+
+def celery_command():
+    from bot.tasks import SCAN_QUEUE_SHARDS
+    queues = ",".join(f"scans.{i}" for i in range(SCAN_QUEUE_SHARDS))
+    # Scans are I/O-bound, so they run as threads of one process by default:
+    # concurrent scans then share one write buffer and group-commit together,
+    # where prefork children each flush their own scan alone.
+    pool = os.getenv('CELERY_POOL', 'threads')
+    command = [sys.executable, "-m", "celery", "-A", "bot.tasks", "worker",
+               "--loglevel", "INFO",
+               "--pool", pool,
+               "--concurrency", os.getenv('CELERY_CONCURRENCY', '16' if pool == 'threads' else str(os.cpu_count() or 1)),
+               "-Q", queues]
+    if pool == 'prefork':
+        command[-2:-2] = ["--max-tasks-per-child", os.getenv('CELERY_MAX_TASKS_PER_CHILD', '1000')]
+    return command
+
+
+def http_check(url):
+    def check():
+        return requests.get(url, timeout=5).status_code == 200
+    return check
+
+
+class Component:
+    def __init__(self, name, command, liveness=None, readiness=None, stop_signal=signal.SIGTERM):
+        self.name = name
+        self.command = command
+        self.liveness = liveness
+        self.readiness = readiness or liveness
+        self.stop_signal = stop_signal
+        self.process = None
+        self.ready = False
+        self.started_at = None
+        self.failures = 0
+        self.restarts = 0
+        self.backoff = 0
+        self.next_start = 0
+        self.stop_requested_at = None
+
+    def start(self):
+        logger.info(f"🚀 Starting {self.name}: {' '.join(self.command)}")
+        self.process = subprocess.Popen(self.command, start_new_session=True)
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.failures = 0
+        self.stop_requested_at = None
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def probe(self, check):
+        if check is None:
+            return self.alive()
+        try:
+            with timer('health_check_seconds', component=self.name):
+                return check()
+        except Exception:
+            return False
+
+    def stop(self):
+        if self.alive():
+            logger.info(f"🛑 Stopping {self.name}")
+            # Only the main process: gunicorn's arbiter and Celery's main process
+            # shut their own children down gracefully. Prefork children reset
+            # SIGTERM to the default, so signalling the group would kill
+            # in-flight scans before worker_process_shutdown can drain.
+            self.process.send_signal(self.stop_signal)
+
+    def kill(self):
+        if self.process is None:
+            return
+        if self.alive():
+            logger.warning(f"⚠️ Killing {self.name} after {SHUTDOWN_TIMEOUT}s")
+        # The whole session, so no orphaned pool children outlive the supervisor.
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def default_components():
+    components = []
+    if os.getenv('MANAGE_MONGOD', '0') == '1':
+        components.append(Component("mongod", ["mongod", "--bind_ip", "127.0.0.1",
+                                               "--dbpath", os.getenv('MONGOD_DBPATH', 'data/db')]))
+    components += [
+        Component("ai_manager",
+                  gunicorn_command("ai_manager.server:create_app()", AI_PORT,
+                                   int(os.getenv('AI_WORKERS', 1)), int(os.getenv('AI_THREADS', 8)),
+                                   timeout=int(os.getenv('AI_WORKER_TIMEOUT', 120))),
+                  liveness=http_check(f"http://127.0.0.1:{AI_PORT}/health"),
+                  readiness=http_check(f"http://127.0.0.1:{AI_PORT}/ready")),
+        Component("dashboard",
+                  gunicorn_command("monitoring.dashboard:server", DASHBOARD_PORT,
+                                   int(os.getenv('DASHBOARD_WORKERS', 2)), int(os.getenv('DASHBOARD_THREADS', 4))),
+                  liveness=http_check(f"http://127.0.0.1:{DASHBOARD_PORT}/")),
+        # SIGTERM is Celery's warm shutdown: running scans finish and the
+        # worker drains its write buffer and notifier on exit.
+        Component("celery", celery_command()),
+        Component("bot", [sys.executable, "main.py", "bot"]),
+    ]
+    return components
+
+
+class Supervisor:
+    def __init__(self, components=None):
+        self.components = components or default_components()
+        self.stopping = False
+
+    def _handle_signal(self, signum, frame):
+        logger.info(f"Received signal {signum}, shutting down")
+        self.stopping = True
+
+    def restart(self, component, now):
+        # Graceful stop first; a process that ignores it past SHUTDOWN_TIMEOUT
+        # is SIGKILLed, and the next check respawns it.
+        if component.stop_requested_at is None:
+            component.stop_requested_at = now
+            component.stop()
+        elif now - component.stop_requested_at >= SHUTDOWN_TIMEOUT:
+            component.kill()
+
+    def check(self, component):
+        now = time.monotonic()
+        if not component.alive():
+            if component.process is not None:
+                component.restarts += 1
+                component.backoff += 1
+                delay = min(2 ** component.backoff, MAX_RESTART_DELAY)
+                logger.error(f"❌ {component.name} exited with {component.process.returncode}, restarting in {delay}s")
+                count('component_restarts_total', component=component.name)
+                component.process = None
+                component.next_start = now + delay
+            if now >= component.next_start:
+                component.start()
+            return
+        if component.stop_requested_at is not None:
+            self.restart(component, now)
+            return
+        if not component.ready:
+            if component.probe(component.readiness):
+                component.ready = True
+                logger.info(f"✅ {component.name} ready")
+            elif now - component.started_at > READINESS_TIMEOUT:
+                logger.error(f"❌ {component.name} not ready after {READINESS_TIMEOUT}s, restarting")
+                self.restart(component, now)
+            return
+        if component.probe(component.liveness):
+            component.failures = 0
+            if now - component.started_at > MAX_RESTART_DELAY:
+                component.backoff = 0
+            return
+        component.failures += 1
+        count('health_check_failures_total', component=component.name)
+        logger.warning(f"⚠️ {component.name} liveness check failed ({component.failures}/{LIVENESS_FAILURES})")
+        if component.failures >= LIVENESS_FAILURES:
+            logger.error(f"❌ {component.name} is unresponsive, restarting")
+            self.restart(component, now)
+
+    def status(self):
+        return {component.name: {"alive": component.alive(), "ready": component.ready,
+                                  "restarts": component.restarts} for component in self.components}
+
+    def shutdown(self):
+        # Producers first, so nothing new is queued while consumers drain.
+        for component in reversed(self.components):
+            component.stop()
+            deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+            while component.alive() and time.monotonic() < deadline:
+                time.sleep(0.2)
+            component.kill()
+        logger.info("👋 All components stopped")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        start_flusher()
+        for component in self.components:
+            component.start()
+        while not self.stopping:
+            for component in self.components:
+                if self.stopping:
+                    break
+                self.check(component)
+            deadline = time.monotonic() + CHECK_INTERVAL
+            while not self.stopping and time.monotonic() < deadline:
+                time.sleep(0.2)
+        self.shutdown()
+        return 0
+
+
+def main():
+    return Supervisor().run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
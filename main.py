@@ -1,43 +1,42 @@
 import os
-import threading
-import time
-import requests
-from bot.bot import BugBountyBot
-from ai_manager.server import app as ai_app
-from monitoring.dashboard import app as dash_app
-import subprocess
+import sys
 
 def run_bot():
+    mode = os.getenv('BOT_MODE', 'polling')
+    if mode in ('async-polling', 'async-webhook'):
+        from bot.async_bot import AsyncBugBountyBot
+        AsyncBugBountyBot().run(webhook=mode == 'async-webhook')
+        return
+    from bot.bot import BugBountyBot
     bot = BugBountyBot()
     bot.run()
 
 def run_ai():
-    ai_app.run(host='0.0.0.0', port=5000, debug=False)
+    # Development server; the launcher serves the app from gunicorn.
+    from ai_manager.server import create_app
+    create_app().run(host='0.0.0.0', port=int(os.getenv('AI_MANAGER_PORT', 5000)), debug=False)
 
 def run_dashboard():
-    dash_app.run_server(host='0.0.0.0', port=8050, debug=False)
+    from monitoring.dashboard import app as dash_app
+    dash_app.run_server(host='0.0.0.0', port=int(os.getenv('DASHBOARD_PORT', 8050)), debug=False)
 
-def ping_self():
-    while True:
-        try:
-            requests.get("http://localhost:5000/health", timeout=5)
-            requests.get("http://localhost:8050", timeout=5)
-            print("✅ Ping successful")
-        except Exception as e:
-            print("❌ Ping failed:", e)
-        time.sleep(300)
+def run_bounty_sync():
+    from bot.bounty_sync import main
+    sys.exit(main(sys.argv[2:]))
 
-def setup_mongo():
-    try:
-        subprocess.run(["mongod", "--fork", "--logpath", "/tmp/mongod.log"], check=True)
-    except:
-        print("⚠️ MongoDB already running or not available")
+COMPONENTS = {
+    'bot': run_bot,
+    'ai': run_ai,
+    'dashboard': run_dashboard,
+    'sync-bounties': run_bounty_sync,
+}
 
 if __name__ == "__main__":
-    setup_mongo()
-    threading.Thread(target=run_bot, daemon=True).start()
-    threading.Thread(target=run_ai, daemon=True).start()
-    threading.Thread(target=run_dashboard, daemon=True).start()
-    threading.Thread(target=ping_self, daemon=True).start()
-    while True:
-        time.sleep(1)
+    if len(sys.argv) > 1:
+        if sys.argv[1] not in COMPONENTS:
+            print(f"Usage: python main.py [{'|'.join(COMPONENTS)}]")
+            sys.exit(2)
+        COMPONENTS[sys.argv[1]]()
+    else:
+        from launcher import main
+        sys.exit(main())
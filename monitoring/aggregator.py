@@ -0,0 +1,135 @@
+import os
+import time
+import threading
+import logging
+from collections import deque
+import requests
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_SEP = "\x06\x16"
+
+SERIES = ("scans_per_minute", "latency_p50", "latency_p90", "latency_p99", "cache_hit_rate", "queue_depth")
+
+
+# One poll per interval feeds every open dashboard, so browser tabs never
+# reach MongoDB, the AI manager or Redis themselves.
+class MetricsAggregator:
+    def __init__(self, db=None, ai_url=None, redis_client=None, interval=None, history=None):
+        self.db = db
+        self.ai_url = (ai_url or os.getenv("AI_MANAGER_URL", "http://localhost:5000")).rstrip('/')
+        self.redis = redis_client
+        self.interval = float(interval or os.getenv("DASHBOARD_POLL_INTERVAL", 5))
+        self.history = int(history or os.getenv("DASHBOARD_HISTORY", 720))
+        self.points = deque(maxlen=self.history)
+        self.seq = 0
+        self.breakdown = {"by_type": {}, "by_severity": {}}
+        self.breakdown_version = 0
+        self.latest = {}
+        self._last_total = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="dashboard-aggregator", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.collect()
+            except Exception as e:
+                logger.error(f"Dashboard aggregation error: {e}")
+            self._stop.wait(self.interval)
+
+    def _database(self):
+        if self.db is None:
+            from bot.database import DatabaseManager
+            self.db = DatabaseManager()
+        return self.db
+
+    def _ai_stats(self):
+        try:
+            response = requests.get(f"{self.ai_url}/stats", timeout=2)
+            return response.json() if response.status_code == 200 else {}
+        except Exception:
+            return {}
+
+    def _queue_depth(self):
+        try:
+            from bot.tasks import SCAN_QUEUE_SHARDS, SCAN_PRIORITY_LEVELS, get_redis
+            client = self.redis or get_redis()
+            pipe = client.pipeline()
+            for shard in range(SCAN_QUEUE_SHARDS):
+                for priority in range(SCAN_PRIORITY_LEVELS):
+                    name = f"scans.{shard}"
+                    pipe.llen(name if priority == 0 else f"{name}{PRIORITY_SEP}{priority}")
+            return sum(pipe.execute())
+        except Exception:
+            return None
+
+    def collect(self):
+        now = time.time()
+        rollup = self._database().get_stats_rollup()
+        ai_stats = self._ai_stats()
+        queue_depth = self._queue_depth()
+        total = rollup.get('total_scans', 0)
+        with self._lock:
+            scans_per_minute = None
+            if self._last_total is not None:
+                previous_total, previous_time = self._last_total
+                scans_per_minute = round(max(total - previous_total, 0) * 60 / max(now - previous_time, 1e-6), 2)
+            self._last_total = (total, now)
+            latency = ai_stats.get('suggest_latency_ms', {})
+            self.seq += 1
+            self.points.append({
+                "seq": self.seq,
+                "time": now,
+                "scans_per_minute": scans_per_minute,
+                "latency_p50": latency.get('p50'),
+                "latency_p90": latency.get('p90'),
+                "latency_p99": latency.get('p99'),
+                "cache_hit_rate": ai_stats.get('cache', {}).get('hit_rate'),
+                "queue_depth": queue_depth,
+            })
+            breakdown = {
+                "by_type": rollup.get('vulnerabilities_by_type', {}),
+                "by_severity": rollup.get('vulnerabilities_by_severity', {})
+            }
+            if breakdown != self.breakdown:
+                self.breakdown = breakdown
+                self.breakdown_version += 1
+            self.latest = {
+                "total_scans": total,
+                "total_vulnerabilities": rollup.get('total_vulnerabilities', 0),
+                "model_version": ai_stats.get('model_version'),
+                "queue_depth": queue_depth,
+            }
+
+    def since(self, seq):
+        with self._lock:
+            if seq > self.seq or (self.points and seq < self.points[0]['seq'] - 1):
+                seq = 0
+            return [point for point in self.points if point['seq'] > seq], self.seq
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.latest), dict(self.breakdown), self.breakdown_version
+
+
+_aggregator = None
+
+
+def get_aggregator():
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = MetricsAggregator()
+    return _aggregator
@@ -1,17 +1,77 @@
+import os
+from datetime import datetime
 import dash
-from dash import dcc, html
+from dash import dcc, html, Input, Output, State
 import plotly.graph_objs as go
-from datetime import datetime
+from monitoring.aggregator import get_aggregator
+
+REFRESH_MS = int(float(os.getenv("DASHBOARD_REFRESH_INTERVAL", 5)) * 1000)
+HISTORY = int(os.getenv("DASHBOARD_HISTORY", 720))
+
+TIME_SERIES = {
+    "scans-graph": ("Scans / minute", ["scans_per_minute"]),
+    "latency-graph": ("/suggest latency (ms)", ["latency_p50", "latency_p90", "latency_p99"]),
+    "cache-graph": ("Suggestion cache hit rate", ["cache_hit_rate"]),
+    "queue-graph": ("Celery queue depth", ["queue_depth"]),
+}
+
+def empty_series_figure(title, fields):
+    figure = go.Figure(data=[go.Scatter(x=[], y=[], mode='lines', name=field) for field in fields])
+    figure.update_layout(title=title, height=300, margin=dict(l=40, r=20, t=40, b=30))
+    return figure
+
+def bar_figure(title, counts):
+    figure = go.Figure(data=[go.Bar(x=list(counts.keys()), y=list(counts.values()))])
+    figure.update_layout(title=title, height=300, margin=dict(l=40, r=20, t=40, b=30))
+    return figure
 
 app = dash.Dash(__name__, title='Bug Bounty AI Monitoring')
+server = app.server
 app.layout = html.Div([
     html.H1("Bug Bounty AI System - Live Dashboard", style={'textAlign': 'center'}),
-    html.H3("System is Online ✅"),
-    dcc.Graph(
-        id='example-graph',
-        figure=go.Figure(data=[go.Bar(x=['A', 'B', 'C'], y=[1, 2, 3])])
-    )
+    html.H3(id='summary', children="Waiting for data..."),
+    html.Div([dcc.Graph(id=graph_id, figure=empty_series_figure(title, fields))
+              for graph_id, (title, fields) in TIME_SERIES.items()]),
+    html.Div([
+        dcc.Graph(id='type-graph', figure=bar_figure("Vulnerabilities by type", {})),
+        dcc.Graph(id='severity-graph', figure=bar_figure("Vulnerabilities by severity", {})),
+    ]),
+    dcc.Store(id='cursor', data={"seq": 0, "breakdown_version": -1}),
+    dcc.Interval(id='refresh', interval=REFRESH_MS),
 ])
 
+@app.callback(
+    [Output(graph_id, 'extendData') for graph_id in TIME_SERIES]
+    + [Output('type-graph', 'figure'), Output('severity-graph', 'figure'), Output('summary', 'children'),
+       Output('cursor', 'data')],
+    Input('refresh', 'n_intervals'),
+    State('cursor', 'data'),
+)
+def push_updates(n_intervals, cursor):
+    aggregator = get_aggregator()
+    aggregator.start()
+    points, seq = aggregator.since(cursor.get('seq', 0))
+    latest, breakdown, breakdown_version = aggregator.snapshot()
+    extends = []
+    for _, fields in TIME_SERIES.values():
+        if not points:
+            extends.append(dash.no_update)
+            continue
+        xs = [datetime.fromtimestamp(point['time']) for point in points]
+        extends.append((
+            {"x": [xs] * len(fields), "y": [[point[field] for point in points] for field in fields]},
+            list(range(len(fields))),
+            HISTORY
+        ))
+    if breakdown_version != cursor.get('breakdown_version'):
+        type_figure = bar_figure("Vulnerabilities by type", breakdown['by_type'])
+        severity_figure = bar_figure("Vulnerabilities by severity", breakdown['by_severity'])
+    else:
+        type_figure = severity_figure = dash.no_update
+    summary = (f"Scans: {latest.get('total_scans', 0)} | Vulnerabilities: {latest.get('total_vulnerabilities', 0)}"
+               f" | Model: {latest.get('model_version') or 'n/a'} | Queued: {latest.get('queue_depth', 'n/a')}")
+    return extends + [type_figure, severity_figure, summary, {"seq": seq, "breakdown_version": breakdown_version}]
+
 if __name__ == '__main__':
+    get_aggregator().start()
     app.run_server(host='0.0.0.0', port=8050, debug=False)
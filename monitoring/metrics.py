@@ -0,0 +1,287 @@
+import os
+import json
+import time
+import bisect
+import inspect
+import functools
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 15))
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.series[key] = self.series.get(key, 0) + amount
+
+    def dump(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self.series.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        self.observe_key(value, tuple(sorted(labels.items())))
+
+    def observe_key(self, value, key):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def dump(self):
+        with self._lock:
+            return [[list(key), [list(counts), total, count]] for key, (counts, total, count) in self.series.items()]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name, help_text=""):
+        return self._get(Counter, name, help_text)
+
+    def histogram(self, name, help_text="", buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def snapshot(self):
+        with self._lock:
+            metrics = list(self.metrics.values())
+        return {metric.name: {
+            "type": metric.kind,
+            "help": metric.help,
+            "buckets": list(getattr(metric, 'buckets', ())),
+            "series": metric.dump()
+        } for metric in metrics}
+
+
+registry = Registry()
+
+
+def _reset_after_fork():
+    # Children start from zero so a parent's counts are not reported twice;
+    # metric objects are kept because decorated functions hold references.
+    registry._lock = threading.Lock()
+    for metric in registry.metrics.values():
+        metric._lock = threading.Lock()
+        metric.series = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("histogram", "key", "started")
+
+    def __init__(self, histogram, key):
+        self.histogram = histogram
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe_key(time.perf_counter() - self.started, self.key)
+        if exc_type is not None:
+            registry.counter(f"{self.histogram.name}_errors_total").inc(**dict(self.key))
+        return False
+
+
+def timer(name, **labels):
+    if not METRICS_ENABLED:
+        return _NULL_TIMER
+    return _Timer(registry.histogram(name), tuple(sorted(labels.items())))
+
+
+def count(name, amount=1, **labels):
+    if METRICS_ENABLED:
+        registry.counter(name).inc(amount, **labels)
+
+
+def timed(name, **labels):
+    # Disabled metrics return the function untouched, so there is no per-call cost.
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+        histogram = registry.histogram(name)
+        key = tuple(sorted(labels.items()))
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    registry.counter(f"{name}_errors_total").inc(**labels)
+                    raise
+                finally:
+                    histogram.observe_key(time.perf_counter() - started, key)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                registry.counter(f"{name}_errors_total").inc(**labels)
+                raise
+            finally:
+                histogram.observe_key(time.perf_counter() - started, key)
+        return wrapper
+    return decorator
+
+
+def instrument_methods(cls, name, methods=None):
+    for attr in methods or [attr for attr, value in vars(cls).items()
+                            if inspect.isfunction(value) and not attr.startswith('_')]:
+        setattr(cls, attr, timed(name, method=attr)(getattr(cls, attr)))
+    return cls
+
+
+def _snapshot_path(pid=None):
+    return os.path.join(METRICS_MULTIPROC_DIR, f"metrics_{pid or os.getpid()}.json")
+
+
+def write_snapshot():
+    if not METRICS_ENABLED or not METRICS_MULTIPROC_DIR:
+        return
+    try:
+        os.makedirs(METRICS_MULTIPROC_DIR, exist_ok=True)
+        path = _snapshot_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(registry.snapshot(), f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.error(f"Metrics snapshot error: {e}")
+
+
+_flusher = None
+_flusher_pid = None
+
+
+def start_flusher(interval=None):
+    global _flusher, _flusher_pid
+    if not METRICS_ENABLED or not METRICS_MULTIPROC_DIR:
+        return
+    if _flusher is not None and _flusher_pid == os.getpid():
+        return
+    interval = interval or METRICS_FLUSH_INTERVAL
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            write_snapshot()
+
+    _flusher = threading.Thread(target=loop, name="metrics-flusher", daemon=True)
+    _flusher_pid = os.getpid()
+    _flusher.start()
+
+
+def _merge(target, snapshot):
+    for name, metric in snapshot.items():
+        merged = target.setdefault(name, {"type": metric["type"], "help": metric["help"],
+                                          "buckets": metric["buckets"], "series": {}})
+        for key, value in metric["series"]:
+            key = tuple(tuple(pair) for pair in key)
+            current = merged["series"].get(key)
+            if metric["type"] == "counter":
+                merged["series"][key] = (current or 0) + value
+            elif current is None:
+                merged["series"][key] = [list(value[0]), value[1], value[2]]
+            else:
+                current[0] = [a + b for a, b in zip(current[0], value[0])]
+                current[1] += value[1]
+                current[2] += value[2]
+
+
+def collect():
+    merged = {}
+    _merge(merged, registry.snapshot())
+    if METRICS_MULTIPROC_DIR and os.path.isdir(METRICS_MULTIPROC_DIR):
+        own = os.path.basename(_snapshot_path())
+        for filename in os.listdir(METRICS_MULTIPROC_DIR):
+            if not filename.startswith("metrics_") or not filename.endswith(".json") or filename == own:
+                continue
+            try:
+                with open(os.path.join(METRICS_MULTIPROC_DIR, filename)) as f:
+                    _merge(merged, json.load(f))
+            except Exception as e:
+                logger.error(f"Metrics snapshot read error ({filename}): {e}")
+    return merged
+
+
+def _labels(key, extra=None):
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def render():
+    lines = []
+    for name, metric in sorted(collect().items()):
+        lines.append(f"# HELP {name} {metric['help'] or name}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for key, value in metric["series"].items():
+            if metric["type"] == "counter":
+                lines.append(f"{name}{_labels(key)} {value}")
+                continue
+            counts, total, observed = value
+            cumulative = 0
+            for bound, bucket_count in zip(metric["buckets"] + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_labels(key, ('le', bound))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(key)} {total}")
+            lines.append(f"{name}_count{_labels(key)} {observed}")
+    return "\n".join(lines) + "\n"
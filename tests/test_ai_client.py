@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from bot.ai_client import FALLBACK_PARAMS, AiClient, CircuitBreaker
+
+STATE = {"target": "https://staging.example.com/api/item?id=1", "method": "POST", "param": "price"}
+
+
+class StubReplica:
+    # Local stand-in for one AI-manager replica answering /suggest.
+    def __init__(self, name, delay=0.0, status=200):
+        self.name = name
+        self.delay = delay
+        self.status = status
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.hits += 1
+                time.sleep(stub.delay)
+                body = json.dumps({"rate": 2000, "intensity": 0.7, "accuracy": 0.6, "timeout": 40,
+                                   "model_version": stub.name}).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    started = []
+
+    def start(name, **kwargs):
+        stub = StubReplica(name, **kwargs)
+        started.append(stub)
+        return stub
+
+    yield start
+    for stub in started:
+        stub.stop()
+
+
+@pytest.fixture
+def dead_url(stubs):
+    # A port that was bound and released, so connects are refused.
+    stub = stubs("dead")
+    stub.stop()
+    return stub.url
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open" and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_pick_prefers_least_outstanding(stubs):
+    client = AiClient([stubs("r0").url, stubs("r1").url], timeout=1)
+    busy, idle = client.replicas
+    busy.outstanding = 3
+    assert client.pick() is idle
+    assert idle.outstanding == 1
+
+
+def test_fails_over_to_healthy_replica_and_opens_dead_circuit(stubs, dead_url):
+    live = stubs("live")
+    client = AiClient([dead_url, live.url], timeout=1)
+    client.replicas[0].breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    for _ in range(10):
+        assert client.suggest_params(STATE)["model_version"] == "live"
+    assert client.replicas[0].breaker.state == "open"
+    assert client.replicas[1].breaker.state == "closed"
+
+
+def test_server_errors_count_as_failures(stubs):
+    broken, live = stubs("broken", status=500), stubs("live")
+    client = AiClient([broken.url, live.url], timeout=1)
+    client.replicas[1].outstanding = 1
+    assert client.suggest_params(STATE)["model_version"] == "live"
+    assert broken.hits == 1
+    assert client.replicas[0].breaker.failures == 1
+
+
+def test_falls_back_immediately_once_all_circuits_are_open(stubs):
+    hanging = [stubs(f"r{i}", delay=1.0) for i in range(2)]
+    client = AiClient([s.url for s in hanging], timeout=0.1)
+    for replica in client.replicas:
+        replica.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    assert client.suggest_params(STATE) == FALLBACK_PARAMS
+    assert [r.breaker.state for r in client.replicas] == ["open", "open"]
+    hits = sum(s.hits for s in hanging)
+    start = time.perf_counter()
+    assert client.suggest_params(STATE) == FALLBACK_PARAMS
+    assert time.perf_counter() - start < 0.05
+    assert sum(s.hits for s in hanging) == hits
+
+
+def test_hedged_request_returns_the_backup_answer(stubs):
+    slow, fast = stubs("slow", delay=1.0), stubs("fast")
+    client = AiClient([slow.url, fast.url], timeout=0.5, hedge=True)
+    client.replicas[1].outstanding = 1
+    start = time.perf_counter()
+    params = client.suggest_params(STATE)
+    elapsed = time.perf_counter() - start
+    client.replicas[1].outstanding -= 1
+    assert params["model_version"] == "fast"
+    # Hedge fires at timeout / 2 while the replica has no latency history.
+    assert 0.2 < elapsed < 0.5
+    assert slow.hits == fast.hits == 1
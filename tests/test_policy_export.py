@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import pytest
+import torch
+from stable_baselines3 import PPO
+from ai_manager.features import STATE_DIM, ACTION_DIM
+from ai_manager.policy_export import NumpyPolicy, check_parity, export_policy, export_with_parity
+from ai_manager.sample_store import SampleStore
+from ai_manager.scan_env import AdvancedScanEnv
+
+TOLERANCE = 1e-5
+
+
+def make_model(tmp_path, **policy_kwargs):
+    env = AdvancedScanEnv(store=SampleStore(str(tmp_path / "samples")))
+    return PPO("MlpPolicy", env, n_steps=64, batch_size=32, n_epochs=1, seed=0,
+               policy_kwargs=dict(net_arch=dict(pi=[32, 32], vf=[32, 32]), **policy_kwargs))
+
+
+def observations(n=256, seed=1):
+    return np.random.default_rng(seed).exponential(1.0, size=(n, STATE_DIM)).astype(np.float32)
+
+
+def exported(model, tmp_path):
+    path = str(tmp_path / "policy.npz")
+    export_policy(model, path)
+    return NumpyPolicy.load(path)
+
+
+def test_matches_ppo_predict_after_training(tmp_path):
+    model = make_model(tmp_path)
+    model.learn(total_timesteps=128)
+    policy = exported(model, tmp_path)
+    obs = observations()
+    expected, _ = model.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs)
+    assert actual.shape == (len(obs), ACTION_DIM)
+    np.testing.assert_allclose(actual, expected, atol=TOLERANCE)
+
+
+def test_single_observation_keeps_ppo_shape(tmp_path):
+    model = make_model(tmp_path)
+    policy = exported(model, tmp_path)
+    obs = observations(1)[0]
+    expected, _ = model.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs)
+    assert actual.shape == expected.shape == (ACTION_DIM,)
+    np.testing.assert_allclose(actual, expected, atol=TOLERANCE)
+
+
+def test_relu_policy(tmp_path):
+    model = make_model(tmp_path, activation_fn=torch.nn.ReLU)
+    policy = exported(model, tmp_path)
+    assert check_parity(model, policy) <= TOLERANCE
+
+
+def test_actions_outside_the_box_are_clipped_like_ppo(tmp_path):
+    model = make_model(tmp_path)
+    # Push the raw action_net output well past both bounds of the [0, 1] box.
+    with torch.no_grad():
+        model.policy.action_net.bias.copy_(torch.tensor([5.0, -5.0] * (ACTION_DIM // 2) + [5.0] * (ACTION_DIM % 2)))
+    policy = exported(model, tmp_path)
+    obs = observations()
+    expected, _ = model.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs)
+    assert set(np.unique(expected)) <= {0.0, 1.0}
+    np.testing.assert_allclose(actual, expected, atol=TOLERANCE)
+
+
+def test_export_with_parity_rejects_divergence(tmp_path):
+    model = make_model(tmp_path)
+    path = str(tmp_path / "policy.npz")
+    assert export_with_parity(model, path) <= TOLERANCE
+    with pytest.raises(ValueError):
+        export_with_parity(model, path, tolerance=-1)
+    assert not os.path.exists(path)